@@ -1 +1 @@
-from frs.main import load
+from frs.main import build, load, load_membership
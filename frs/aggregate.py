@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+from typing import List, Union
+from frs.membership import MembershipIndex, reduce_segments
+
+# Entities from the lowest level to the highest.
+LEVELS = ["person", "benunit", "household"]
+
+
+class Aggregator:
+    """Weighted totals, means and quantiles of the columns of a loaded
+    dataset, at any entity level and by group.
+
+    Values are moved up to a higher entity by adding up its members' values,
+    and down to a lower entity by giving each member the value of its benefit
+    unit or household. By default, every entity is weighted by the
+    household_weight of its household (the FRS grossing factor, which is the
+    same for every member of a household).
+    """
+
+    def __init__(
+        self,
+        person: pd.DataFrame,
+        benunit: pd.DataFrame,
+        household: pd.DataFrame,
+        index: MembershipIndex = None,
+    ):
+        """
+        Args:
+            person (pd.DataFrame): The person dataset, from frs.load()
+            benunit (pd.DataFrame): The benefit unit dataset
+            household (pd.DataFrame): The household dataset
+            index (MembershipIndex, optional): The datasets' membership
+                index, from frs.load_membership(). Built from the ID
+                columns if not given.
+        """
+        self.frames = dict(person=person, benunit=benunit, household=household)
+        if index is None:
+            index = MembershipIndex.build(person, benunit, household)
+        self.index = index
+
+    def entity_of(self, column: str) -> str:
+        for entity in LEVELS:
+            if column in self.frames[entity]:
+                return entity
+        raise KeyError(f"{column} is not a column of any entity.")
+
+    def move(self, values, entity: str, to: str) -> np.ndarray:
+        """Moves values from one entity to another.
+
+        Args:
+            values (array-like): A value per row of the entity's DataFrame,
+                or a 2D array with a column of values per row
+            entity (str): The entity of the values
+            to (str): The entity to move them to
+
+        Returns:
+            np.ndarray: A value (or row of values) per row of the target
+            entity's DataFrame
+        """
+        values = np.asarray(values)
+        if LEVELS.index(to) > LEVELS.index(entity):
+            totals = self.index.sum(values, entity, by=to)
+            rows = getattr(self.index, f"{to}_rows")
+            result = np.empty_like(totals)
+            result[rows] = totals
+            return result
+        if LEVELS.index(to) < LEVELS.index(entity):
+            rows = getattr(self.index, f"{entity}_rows")
+            return values[rows][getattr(self.index, f"{to}_{entity}")]
+        return values
+
+    def column(self, column: str, at: str) -> np.ndarray:
+        entity = self.entity_of(column)
+        values = self.frames[entity][column].to_numpy(np.float64)
+        return self.move(values, entity, at)
+
+    def groups(self, by: str, at: str) -> tuple:
+        """Returns the group of each row of an entity, as codes and labels.
+        Groups must be defined at the entity's level or above. Rows with a
+        missing group value form a group of their own, labelled NaN, last.
+        """
+        if by is None:
+            return np.zeros(len(self.frames[at]), dtype=np.int64), None
+        entity = self.entity_of(by)
+        if LEVELS.index(entity) < LEVELS.index(at):
+            raise ValueError(
+                f"Cannot group {at} values by {by}, a {entity} column."
+            )
+        codes, labels = pd.factorize(self.frames[entity][by], sort=True)
+        missing = codes < 0
+        if missing.any():
+            codes = np.where(missing, len(labels), codes)
+            labels = np.append(np.asarray(labels, dtype=object), np.nan)
+        return self.move(codes, entity, at), pd.Index(labels, name=by)
+
+    def weights(self, at: str, weight: str = None) -> np.ndarray:
+        if weight is None:
+            return self.move(
+                self.frames["household"]["household_weight"].to_numpy(
+                    np.float64
+                ),
+                "household",
+                at,
+            )
+        return self.column(weight, at)
+
+    def sum(
+        self,
+        columns: Union[str, List[str]],
+        at: str = None,
+        by: str = None,
+        weight: str = None,
+    ) -> Union[pd.Series, pd.DataFrame]:
+        """Weighted totals of one or more columns.
+
+        Args:
+            columns (Union[str, List[str]]): The columns
+            at (str, optional): The entity to move the columns to before
+                weighting them. Defaults to the entity of the first column.
+            by (str, optional): A column to group by, such as "region" or
+                "country". Defaults to no grouping.
+            weight (str, optional): The weight column. Defaults to the
+                household weight.
+
+        Returns:
+            Union[pd.Series, pd.DataFrame]: The total of each column, or of
+            each column in each group
+        """
+        return self.aggregate(columns, at, by, weight, mean=False)
+
+    def mean(
+        self,
+        columns: Union[str, List[str]],
+        at: str = None,
+        by: str = None,
+        weight: str = None,
+    ) -> Union[pd.Series, pd.DataFrame]:
+        """Weighted means of one or more columns, with the arguments of
+        sum.
+        """
+        return self.aggregate(columns, at, by, weight, mean=True)
+
+    def aggregate(
+        self,
+        columns: Union[str, List[str]],
+        at: str,
+        by: str,
+        weight: str,
+        mean: bool,
+    ) -> Union[pd.Series, pd.DataFrame]:
+        if isinstance(columns, str):
+            columns = [columns]
+        at = at or self.entity_of(columns[0])
+        values = np.column_stack([self.column(name, at) for name in columns])
+        weights = self.weights(at, weight)
+        codes, labels = self.groups(by, at)
+        order = np.argsort(codes, kind="stable")
+        size = 1 if labels is None else len(labels)
+        bounds = np.concatenate(
+            [[0], np.cumsum(np.bincount(codes, minlength=size))]
+        )
+        totals = reduce_segments((values * weights[:, None])[order], bounds)
+        if mean:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                totals = (
+                    totals / reduce_segments(weights[order], bounds)[:, None]
+                )
+        if labels is None:
+            return pd.Series(totals[0], index=columns)
+        return pd.DataFrame(totals, index=labels, columns=columns)
+
+    def quantile(
+        self,
+        columns: Union[str, List[str]],
+        q: Union[float, List[float]] = 0.5,
+        at: str = None,
+        by: str = None,
+        weight: str = None,
+    ) -> pd.DataFrame:
+        """Weighted quantiles of one or more columns: the lowest value at
+        which the cumulative weight reaches the given share of the total.
+
+        Args:
+            columns (Union[str, List[str]]): The columns
+            q (Union[float, List[float]], optional): The quantiles, between
+                0 and 1. Defaults to 0.5, the median.
+            at (str, optional): The entity to move the columns to. Defaults
+                to the entity of the first column.
+            by (str, optional): A column to group by. Defaults to no
+                grouping.
+            weight (str, optional): The weight column. Defaults to the
+                household weight.
+
+        Returns:
+            pd.DataFrame: The quantiles of each column, with a row per
+            quantile, or per group and quantile
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        quantiles = np.atleast_1d(q).astype(np.float64)
+        at = at or self.entity_of(columns[0])
+        weights = self.weights(at, weight)
+        codes, labels = self.groups(by, at)
+        size = 1 if labels is None else len(labels)
+        result = {}
+        for name in columns:
+            values = self.column(name, at)
+            order = np.lexsort((values, codes))
+            sorted_codes = codes[order]
+            cumulative = np.cumsum(weights[order])
+            bounds = np.concatenate(
+                [[0], np.cumsum(np.bincount(codes, minlength=size))]
+            )
+            before = np.concatenate([[0], cumulative])[bounds[:-1]]
+            totals = np.concatenate([[0], cumulative])[bounds[1:]] - before
+            with np.errstate(invalid="ignore", divide="ignore"):
+                shares = (cumulative - before[sorted_codes]) / totals[
+                    sorted_codes
+                ]
+            # Group g's shares lie in (g, g + 1] once offset by g, so one
+            # search finds the quantile of every group.
+            keys = sorted_codes + shares
+            groups = np.repeat(np.arange(size), len(quantiles))
+            targets = groups + np.tile(quantiles, size)
+            found = np.where(
+                targets == groups,
+                np.searchsorted(keys, targets, side="right"),
+                np.searchsorted(keys, targets, side="left"),
+            )
+            found = np.clip(
+                found, bounds[groups], np.maximum(bounds[groups + 1] - 1, 0)
+            )
+            value = values[order][found] if len(values) else np.nan
+            empty = (bounds[groups + 1] == bounds[groups]) | ~(
+                totals[groups] > 0
+            )
+            result[name] = np.where(empty, np.nan, value)
+        if labels is None:
+            index = pd.Index(quantiles, name="quantile")
+        else:
+            index = pd.MultiIndex.from_product(
+                [labels, quantiles], names=[by, "quantile"]
+            )
+        return pd.DataFrame(result, index=index)
@@ -0,0 +1,196 @@
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+import numpy as np
+import pandas as pd
+from frs.dataset import Dataset
+from frs.synthetic import generate_tab
+from frs.tables import tables
+from frs.utils import data_folder, resolve
+
+# Modules that 'import frs' and 'frs status' should not import, as they are
+# slow to import.
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "tqdm",
+    "requests",
+    "frs.tables",
+]
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import frs
+seconds = time.perf_counter() - start
+from frs.main import main
+sys.argv = ["frs", "status"]
+main()
+print(json.dumps(dict(
+    seconds=seconds, modules=[m for m in {modules} if m in sys.modules]
+)))
+"""
+
+
+def measure_startup(repeat: int = 5) -> dict:
+    """Measures how long 'import frs' and 'frs status' take, each in a new
+    Python process, and which slow modules they import.
+
+    Args:
+        repeat (int, optional): The number of processes to time.
+            Defaults to 5.
+
+    Returns:
+        dict: The fastest import and status times in seconds, and the slow
+        modules imported
+    """
+    script = STARTUP_SCRIPT.format(modules=HEAVY_MODULES)
+    import_times, status_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        status_times += [time.perf_counter() - start]
+        result = json.loads(output.splitlines()[-1])
+        import_times += [result["seconds"]]
+    return dict(
+        import_seconds=min(import_times),
+        status_seconds=min(status_times),
+        heavy_modules=result["modules"],
+    )
+
+
+def measure(stage: Callable, repeat: int = 1, setup: Callable = None) -> dict:
+    """Times a stage, then runs it once more to find its peak memory.
+
+    Args:
+        stage (Callable): The stage, taking no arguments
+        repeat (int, optional): The number of timed runs. Defaults to 1.
+        setup (Callable, optional): Run untimed before every run of the
+            stage, such as to clear a cache. Defaults to None.
+
+    Returns:
+        dict: The fastest time in seconds, and the peak memory in bytes
+        allocated by this process (not by any worker processes)
+    """
+    times = []
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            for _ in range(repeat):
+                if setup is not None:
+                    setup()
+                start = time.perf_counter()
+                stage()
+                times += [time.perf_counter() - start]
+            if setup is not None:
+                setup()
+            tracemalloc.start()
+            try:
+                stage()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    return dict(seconds=min(times), peak_memory=peak)
+
+
+def run_benchmark(
+    scales: List[float] = [1],
+    engine: str = "column",
+    workers: int = 1,
+    formats: List[str] = ["csv"],
+    repeat: int = 1,
+    seed: int = 0,
+) -> dict:
+    """Times parsing, generation and loading on synthetic TAB files, each in
+    a temporary data folder so that stored data is left untouched, and the
+    startup time of the package and the 'frs status' command.
+
+    Args:
+        scales (List[float], optional): The sizes of the synthetic surveys,
+            as multiples of a year of the FRS. Defaults to [1].
+        engine (str, optional): The parsing engine. Defaults to "column".
+        workers (int, optional): The number of parsing processes.
+            Defaults to 1.
+        formats (List[str], optional): The output formats. Defaults to
+            ["csv"].
+        repeat (int, optional): The number of timed runs of each stage.
+            Defaults to 1.
+        seed (int, optional): The random seed of the synthetic data.
+            Defaults to 0.
+
+    Returns:
+        dict: The settings, environment, startup time and results of the
+        benchmark
+    """
+    from frs.cache import LOAD_CACHE
+    from frs.main import __version__, generate_csv, load
+
+    with tempfile.TemporaryDirectory() as folder, data_folder(folder):
+        startup = measure_startup()
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as folder, data_folder(folder):
+            (Path(folder) / "csv").mkdir()
+            rows = generate_tab(resolve("tab"), scale=scale, seed=seed)
+            tab_bytes = sum(
+                (resolve("tab") / filename).stat().st_size for filename in rows
+            )
+            stages = dict(
+                parse=lambda: Dataset(tables).parse(
+                    engine=engine, workers=workers
+                ),
+                generate=lambda: generate_csv(
+                    engine=engine, workers=workers, formats=formats, full=True
+                ),
+                load=load,
+            )
+            result = dict(
+                scale=scale,
+                households=rows["househol.tab"],
+                tab_rows=sum(rows.values()),
+                tab_bytes=tab_bytes,
+                stages={},
+            )
+            # Loads are served from the load cache after the first, so it is
+            # cleared before every run to time reading the outputs.
+            setups = dict(load=LOAD_CACHE.clear)
+            for name, stage in stages.items():
+                timing = measure(stage, repeat, setups.get(name))
+                timing["rows_per_second"] = (
+                    result["tab_rows"] / timing["seconds"]
+                )
+                timing["bytes_per_second"] = tab_bytes / timing["seconds"]
+                result["stages"][name] = timing
+            results += [result]
+    return dict(
+        settings=dict(
+            engine=engine,
+            workers=workers,
+            formats=formats,
+            repeat=repeat,
+            seed=seed,
+        ),
+        environment=dict(
+            frs=__version__,
+            python=platform.python_version(),
+            numpy=np.__version__,
+            pandas=pd.__version__,
+            platform=platform.platform(),
+            cpus=os.cpu_count(),
+        ),
+        startup=startup,
+        results=results,
+    )
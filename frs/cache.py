@@ -0,0 +1,143 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import List
+
+# The default memory budget of the load cache, in bytes.
+DEFAULT_BUDGET = 2**30
+
+
+class LoadCache:
+    """Holds the DataFrames returned by recent calls to frs.load(), evicting
+    the least recently used once their total size exceeds a memory budget.
+    """
+
+    def __init__(self, budget: int = DEFAULT_BUDGET):
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.signatures = {}
+        self.shared = {}
+        self.budget = budget
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget: int):
+        self._budget = budget
+        self.evict()
+
+    @property
+    def size(self) -> int:
+        return sum(self.sizes.values())
+
+    def get(self, key, signature=None) -> list:
+        """Returns the cached DataFrames of a key, unless the files they were
+        read from have changed since.
+
+        Args:
+            key: The key the DataFrames were stored under
+            signature (optional): The current state of the files the
+                DataFrames were read from. Defaults to None.
+
+        Returns:
+            list: The DataFrames, or None if there are none or
+            they are out of date
+        """
+        if key not in self.entries:
+            return None
+        if self.signatures[key] != signature:
+            self.remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return [
+            copy_frame(frame, self.shared[key]) for frame in self.entries[key]
+        ]
+
+    def put(
+        self,
+        key,
+        frames: list,
+        signature=None,
+        size: int = None,
+        shared: bool = False,
+    ):
+        """Stores DataFrames under a key, evicting others to keep within the
+        memory budget.
+
+        Args:
+            key: The key to store the DataFrames under
+            frames (list): The DataFrames
+            signature (optional): The current state of the files the
+                DataFrames were read from. Defaults to None.
+            size (int, optional): The memory the DataFrames take up, in
+                bytes. Defaults to their deep memory usage.
+            shared (bool, optional): Whether the DataFrames' columns are
+                read-only memory-mapped arrays, which are never copied.
+                Defaults to False.
+        """
+        if size is None:
+            size = sum(
+                int(frame.memory_usage(deep=True).sum()) for frame in frames
+            )
+        self.remove(key)
+        if size > self.budget:
+            return
+        self.entries[key] = [copy_frame(frame, shared) for frame in frames]
+        self.sizes[key] = size
+        self.signatures[key] = signature
+        self.shared[key] = shared
+        self.evict()
+
+    def evict(self):
+        while self.size > self.budget:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        self.entries.pop(key, None)
+        self.sizes.pop(key, None)
+        self.signatures.pop(key, None)
+        self.shared.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.signatures.clear()
+        self.shared.clear()
+
+
+def copy_on_write() -> bool:
+    """Returns whether pandas copies a DataFrame's data when it is changed
+    through a shallow copy, as it always does from pandas 3.
+    """
+    import pandas as pd
+
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def copy_frame(frame, shared: bool = False):
+    """Copies a cached DataFrame, so that changes to the copy do not reach
+    the cache. Without copy-on-write, the data itself has to be copied,
+    unless it is read-only memory-mapped data.
+    """
+    return frame.copy(deep=not (shared or copy_on_write()))
+
+
+def file_signature(paths: List[Path]) -> tuple:
+    """Returns the modification time and size of each of a list of files or
+    folders, or None for those that do not exist.
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature += [(stat.st_mtime_ns, stat.st_size)]
+        except FileNotFoundError:
+            signature += [None]
+    return tuple(signature)
+
+
+LOAD_CACHE = LoadCache()
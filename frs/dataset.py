@@ -1,109 +1,820 @@
-from csv import DictReader
+import csv
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import List
 from tqdm import tqdm
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype
 from pathlib import Path
+from frs.mapping import Plan
+from frs.profiling import rate, report
+from frs.storage import compression_of, open_text, tab_path
 from frs.utils import resolve
 from functools import wraps
+import time
 
 
 class Table:
     fieldnames = []
+    accumulate = []
+    dtypes = {}
     enums = {}
     entity = None
     folder = "tab"
     filename = None
     delimiter = "\t"
+    # The TAB file columns the table reads. If None, they are found from the
+    # mapping of a MappedTable, or else by running parse_columns on no rows
+    # and recording the columns it reads.
+    source_columns = None
 
     @staticmethod
     def parse(entity: dict, line: dict) -> dict:
         return NotImplementedError()
 
+    @staticmethod
+    def parse_columns(line: "SafeColumns") -> dict:
+        """Column-wise counterpart of parse, used by the column engine.
+
+        Returns a dict of columns per entity, aligned with the rows of the
+        TAB file. Missing values mean the row does not set that field, and
+        fields listed in accumulate are added to any existing value.
+        """
+        raise NotImplementedError()
+
+
+class PivotTable(Table):
+    """A long-format table, with a row per entity and code rather than a row
+    per entity: for example, a row for each benefit each person receives.
+
+    Instead of parse and parse_columns, pivot gives the output field and
+    amount of each row. Rows are grouped by entity ID and field, the amounts
+    of each group are combined with the reducer, and the result is pivoted
+    into a column per field, in one pass over the whole table with either
+    engine. Each field must be listed in the fieldnames of the entity it
+    belongs to.
+    """
+
+    # How the amounts of an entity's rows with the same field are combined:
+    # "sum", "mean", "min", "max", "first", "last" or "count".
+    reducer = "sum"
+
+    @staticmethod
+    def pivot(line: "SafeColumns") -> list:
+        """Returns the output field and amount of each row.
+
+        Returns a list of (fields, amounts) pairs of Series aligned with the
+        rows of the TAB file, giving each row a field (or a missing value
+        to skip it) and an amount. A row can feed several fields by
+        appearing in several pairs.
+        """
+        raise NotImplementedError()
+
+
+class MappedTable(Table):
+    """A table declared as a mapping from output fields to expressions of
+    its TAB file's columns (see frs.mapping), instead of parse and
+    parse_columns:
+
+        mapping = dict(
+            person_id=ID(Person),
+            earnings=Column("INEARNS").yearly(),
+            care_hours=Column("HOURTOT").map(CARE_HOURS_CODES),
+            is_adult=True,
+        )
+
+    Tables feeding several entities give a mapping per entity, as with
+    fieldnames. Each mapping is compiled once into a Plan, which both
+    engines run, and the TAB file columns it reads are known without
+    running it.
+    """
+
+    mapping = {}
+
+    @classmethod
+    def parse(cls, *args) -> dict:
+        *rows, line = args
+        for row, plan in zip(rows, mapping_plans(cls)):
+            for field, value in plan.evaluate(line).items():
+                if field in cls.accumulate:
+                    value = row[field] + value
+                row[field] = value
+        return tuple(rows) if len(rows) > 1 else rows[0]
+
+    @classmethod
+    def parse_columns(cls, line: "SafeColumns") -> dict:
+        result = tuple(plan.evaluate(line) for plan in mapping_plans(cls))
+        return result if len(result) > 1 else result[0]
+
+
+@lru_cache(maxsize=None)
+def mapping_plans(table: MappedTable) -> list:
+    """Compiles the mapping of a MappedTable, once per table, into a Plan
+    per entity it feeds.
+    """
+    if isinstance(table.entity, list):
+        return [Plan(table.mapping[entity]) for entity in table.entity]
+    return [Plan(table.mapping)]
+
 
 class Entity:
-    def __init__(self):
-        self.entries = {}
+    """The rows of an entity, stored as one typed array per field.
+
+    index maps each entity ID to its row, and each field has an array of
+    values and an array marking which rows have set it. Arrays grow as rows
+    are added, and fields are added as tables first set them.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.index = {}
+        self.columns = {}
+        self.present = {}
+        self.size = 0
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        return self.size
+
+    def row(self, identity: int) -> "EntityRow":
+        """Returns the row of an ID, adding it if it is new."""
+        if identity not in self.index:
+            if self.size == self.capacity:
+                self.grow(2 * self.capacity)
+            self.index[identity] = self.size
+            self.size += 1
+        return EntityRow(self, self.index[identity])
+
+    def grow(self, capacity: int):
+        for field, column in self.columns.items():
+            self.columns[field] = np.concatenate(
+                [column, np.zeros(capacity - self.capacity, column.dtype)]
+            )
+            self.present[field] = np.concatenate(
+                [self.present[field], np.zeros(capacity - self.capacity, bool)]
+            )
+        self.capacity = capacity
+
+    def column(self, field: str, dtype: np.dtype) -> np.ndarray:
+        """Returns the array of a field, creating it or widening its type so
+        that it can hold values of the given type.
+        """
+        if field not in self.columns:
+            self.columns[field] = np.zeros(self.capacity, dtype)
+            self.present[field] = np.zeros(self.capacity, bool)
+        column = self.columns[field]
+        if column.dtype != dtype and column.dtype != object:
+            if {column.dtype, dtype} == {np.dtype(np.int64), np.dtype(float)}:
+                column = column.astype(float)
+            else:
+                column = column.astype(object)
+            self.columns[field] = column
+        return column
+
+    def set(self, row: int, field: str, value):
+        self.column(field, value_dtype(value))[row] = value
+        self.present[field][row] = True
+
+    def get(self, row: int, field: str) -> float:
+        if field not in self.columns or not self.present[field][row]:
+            return 0
+        try:
+            return float(self.columns[field][row])
+        except:
+            return 0
+
+    def merge(self, partial: "Entity", accumulate: List[str] = []):
+        """Merges a table's partial rows into the entity: new IDs are
+        appended, later tables override earlier ones, and accumulated fields
+        are added to any existing value.
+        """
+        rows = np.array(
+            [self.row(identity).row for identity in partial.index],
+            dtype=np.int64,
+        )
+        for field, column in partial.columns.items():
+            present = partial.present[field][: partial.size]
+            values = column[: partial.size][present]
+            target = rows[present]
+            if field in accumulate:
+                values = values + np.array(
+                    [self.get(row, field) for row in target], dtype=float
+                )
+            self.column(field, values.dtype)[target] = values
+            self.present[field][target] = True
+
+    def to_frame(self, fieldnames: List[str]) -> pd.DataFrame:
+        """Returns the entity's rows as a DataFrame, filling fields a row
+        never set with zero.
+        """
+        data = {}
+        for field in fieldnames:
+            if field not in self.columns:
+                data[field] = np.zeros(self.size, np.int64)
+                continue
+            column = self.columns[field][: self.size]
+            present = self.present[field][: self.size]
+            if not present.any():
+                column = np.zeros(self.size, np.int64)
+            elif not present.all():
+                if column.dtype == bool:
+                    column = column.astype(object)
+                column = np.where(present, column, 0).astype(column.dtype)
+            data[field] = column
+        return pd.DataFrame(data, columns=fieldnames)
+
+    # The TAB file columns an entity's IDs are made from.
+    id_columns = []
 
     @staticmethod
     def id(line: dict) -> int:
         return NotImplementedError()
 
+    @staticmethod
+    def ids(line: "SafeColumns") -> pd.Series:
+        raise NotImplementedError()
+
 
 class Person(Entity):
+    id_columns = ["sernum", "PERSON"]
+
     @staticmethod
     def id(line: dict) -> int:
         return 1000000 + int(line["sernum"]) * 10 + int(line["PERSON"])
 
+    @staticmethod
+    def ids(line: "SafeColumns") -> pd.Series:
+        return (
+            1000000
+            + line["sernum"].astype(np.int64) * 10
+            + line["PERSON"].astype(np.int64)
+        )
+
 
 class BenUnit(Entity):
+    id_columns = ["sernum", "BENUNIT"]
+
     @staticmethod
     def id(line: dict) -> int:
         return 2000000 + int(line["sernum"]) * 10 + int(line["BENUNIT"])
 
+    @staticmethod
+    def ids(line: "SafeColumns") -> pd.Series:
+        return (
+            2000000
+            + line["sernum"].astype(np.int64) * 10
+            + line["BENUNIT"].astype(np.int64)
+        )
+
 
 class Household(Entity):
+    id_columns = ["sernum"]
+
     @staticmethod
     def id(line: dict) -> int:
         return 3000000 + int(line["sernum"]) * 10
 
+    @staticmethod
+    def ids(line: "SafeColumns") -> pd.Series:
+        return 3000000 + line["sernum"].astype(np.int64) * 10
+
 
 class Dataset:
-    def __init__(self, tables: List[Table]):
+    def __init__(
+        self, tables: List[Table], sample: "Sample" = None, folder: Path = None
+    ):
+        """
+        Args:
+            tables (List[Table]): The tables to parse, in order
+            sample (Sample, optional): A sample of households to parse
+                instead of every household. Defaults to None.
+            folder (Path, optional): The folder to read the TAB files from.
+                Defaults to each table's folder in the data folder.
+        """
         self.tables = tables
+        self.sample = sample
+        self.folder = folder
         self.entities = []
         for table in tables:
             if isinstance(table.entity, list):
                 self.entities += table.entity
             elif issubclass(table.entity, Entity):
                 self.entities += [table.entity]
-        self.entities = list(set(self.entities))
+        self.entities = list(dict.fromkeys(self.entities))
+        self.profile = dict(tables={}, entities={})
+
+    def parse(self, engine: str = "row", workers: int = 1) -> dict:
+        """Parses every table, merging their results in table order.
+
+        Args:
+            engine (str, optional): "row" to parse row by row into dicts, or
+                "column" to parse whole columns into DataFrames.
+            workers (int, optional): The number of processes to parse tables
+                in. Defaults to 1.
 
-    def parse(self) -> dict:
+        Returns:
+            dict, dict: The data of each entity, and its fieldnames.
+
+        The rows, bytes and time taken by each table and entity are recorded
+        in the profile attribute, and passed to any profiling hooks.
+        """
+        self.profile = dict(tables={}, entities={})
         data = {}
         fieldnames = {}
         for entity in self.entities:
-            data[entity] = entity()
+            if engine == "column":
+                data[entity] = pd.DataFrame(index=pd.Index([], dtype=np.int64))
+            else:
+                data[entity] = entity()
             fieldnames[entity] = []
-        for table in self.tables:
-            table_entities = table.entity
-            if not isinstance(table_entities, list):
-                table_entities = [table_entities]
-            for entity in table_entities:
-                if isinstance(table.fieldnames, list):
-                    fieldnames[entity] += table.fieldnames
-                elif isinstance(table.fieldnames, dict):
-                    fieldnames[entity] += table.fieldnames[entity]
-            with open(
-                Path(resolve(table.folder)) / table.filename, encoding="utf-8"
-            ) as f:
-                reader = DictReader(
-                    f,
-                    fieldnames=next(f).split("\t"),
-                    delimiter=table.delimiter,
-                )
-                first_line = True
-                for line in tqdm(reader, desc="Reading " + table.filename):
-                    identities = []
-                    entities = []
-                    for entity in table_entities:
-                        entity_id = entity.id(line)
-                        if entity_id not in data[entity].entries:
-                            data[entity].entries[entity_id] = SafeDict()
-                        identities += [entity_id]
-                        entities += [data[entity].entries[entity_id]]
-                    result = table.parse(*entities, SafeDict(line))
-                    if not isinstance(result, tuple):
-                        result = (result,)
-                    for entity, identity, res in zip(
-                        table_entities, identities, result
-                    ):
-                        data[entity].entries[identity] = res
-                        if first_line:
-                            fieldnames[entity] += list(res.keys())
-                    first_line = False
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            results = executor.map(
+                parse_table,
+                self.tables,
+                repeat(engine),
+                repeat(False),
+                repeat(self.sample),
+                repeat(self.folder),
+            )
+        else:
+            results = map(
+                parse_table,
+                self.tables,
+                repeat(engine),
+                repeat(engine == "row"),
+                repeat(self.sample),
+                repeat(self.folder),
+            )
+        if workers > 1 or engine == "column":
+            results = tqdm(
+                results, total=len(self.tables), desc="Reading TAB files"
+            )
+        try:
+            for table, (table_data, table_fieldnames, stats) in zip(
+                self.tables, results
+            ):
+                start = time.perf_counter()
+                for entity, partial in table_data.items():
+                    if engine == "column":
+                        data[entity] = merge_columns(
+                            data[entity], partial, table.accumulate
+                        )
+                    else:
+                        data[entity].merge(partial, table.accumulate)
+                    fieldnames[entity] += table_fieldnames[entity]
+                stats["merge_seconds"] = time.perf_counter() - start
+                self.record_table(table, stats)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        declared = self.fieldnames()
         for entity in self.entities:
-            fieldnames[entity] = list(set(fieldnames[entity]))
+            fieldnames[entity] = ordered_fieldnames(
+                declared[entity], fieldnames[entity]
+            )
+            self.record_entity(entity, len(data[entity]))
+        self.report()
         return data, fieldnames
 
+    def record_table(self, table: Table, stats: dict):
+        """Adds the statistics of parsing (some of) a table to the profile."""
+        profile = self.profile["tables"].setdefault(
+            table.__name__,
+            dict(
+                filename=table.filename,
+                rows=0,
+                bytes_read=0,
+                seconds=0,
+                merge_seconds=0,
+                entity_rows={},
+            ),
+        )
+        for key in ("rows", "bytes_read", "seconds", "merge_seconds"):
+            profile[key] += stats[key]
+        for name, rows in stats["entity_rows"].items():
+            profile["entity_rows"][name] = (
+                profile["entity_rows"].get(name, 0) + rows
+            )
+        profile["rows_per_second"] = rate(profile["rows"], profile["seconds"])
+        for name in profile["entity_rows"]:
+            entity = self.profile["entities"].setdefault(
+                name, dict(rows=0, tables=[], merge_seconds=0)
+            )
+            if table.__name__ not in entity["tables"]:
+                entity["tables"] += [table.__name__]
+            entity["merge_seconds"] += stats["merge_seconds"]
+
+    def record_entity(self, entity: type, rows: int):
+        name = entity.__name__.lower()
+        profile = self.profile["entities"].setdefault(
+            name, dict(rows=0, tables=[], merge_seconds=0)
+        )
+        profile["rows"] += rows
+
+    def report(self):
+        for name, stats in self.profile["tables"].items():
+            report("table", name, stats)
+        for name, stats in self.profile["entities"].items():
+            report("entity", name, stats)
+
+    def fieldnames(self) -> dict:
+        """Returns the fieldnames of each entity without reading any data,
+        by running each table's parse_columns on no rows. Fields are in a
+        fixed order: in table order, each table's declared fieldnames and
+        then the fields its parse_columns sets, in the order it sets them.
+        Tables with only a parse method give their declared fieldnames, and
+        the other fields they set follow in the order they were parsed.
+        """
+        fieldnames = {entity: [] for entity in self.entities}
+        empty = SafeColumns(pd.DataFrame(index=pd.RangeIndex(0)))
+        for table in self.tables:
+            try:
+                _, table_fieldnames = parse_table_columns(table, empty)
+            except NotImplementedError:
+                table_fieldnames = declared_fieldnames(table)
+            for entity, names in table_fieldnames.items():
+                fieldnames[entity] += names
+        return {
+            entity: list(dict.fromkeys(names))
+            for entity, names in fieldnames.items()
+        }
+
+    def dtypes(self) -> dict:
+        """Returns the declared dtype of each entity's fields. Tables feeding
+        several entities declare dtypes per entity, as with fieldnames.
+        """
+        dtypes = {entity: {} for entity in self.entities}
+        for table in self.tables:
+            for entity in table_entity_list(table):
+                if isinstance(table.entity, list):
+                    dtypes[entity].update(table.dtypes.get(entity, {}))
+                else:
+                    dtypes[entity].update(table.dtypes)
+        return dtypes
+
+    def stream(self, households: int = 1000):
+        """Parses the tables with the column engine, a block of households
+        at a time, so that memory use depends on the block size rather than
+        the size of the survey.
+
+        Args:
+            households (int, optional): The number of households in each
+                block. Defaults to 1000.
+
+        Yields:
+            dict: A DataFrame per entity, holding every row of the block's
+            households
+        """
+        self.profile = dict(tables={}, entities={})
+        streams = [
+            TableStream(
+                table,
+                rows=households * 10,
+                sample=self.sample,
+                folder=self.folder,
+            )
+            for table in self.tables
+        ]
+        while True:
+            boundary = None
+            for table_stream in streams:
+                boundary = table_stream.boundary(households)
+                if boundary is not None:
+                    break
+            if boundary is None:
+                for table in self.tables:
+                    if table.__name__ in self.profile["tables"]:
+                        self.profile["tables"][table.__name__][
+                            "bytes_read"
+                        ] = file_size(table, self.folder)
+                self.report()
+                return
+            data = {
+                entity: pd.DataFrame(index=pd.Index([], dtype=np.int64))
+                for entity in self.entities
+            }
+            for table, table_stream in zip(self.tables, streams):
+                start = time.perf_counter()
+                line = table_stream.take(boundary)
+                table_data, _ = parse_table_columns(table, line)
+                stats = dict(
+                    rows=len(line),
+                    bytes_read=0,
+                    seconds=time.perf_counter() - start,
+                    entity_rows={
+                        entity.__name__.lower(): len(partial)
+                        for entity, partial in table_data.items()
+                    },
+                )
+                start = time.perf_counter()
+                for entity, partial in table_data.items():
+                    data[entity] = merge_columns(
+                        data[entity], partial, table.accumulate
+                    )
+                stats["merge_seconds"] = time.perf_counter() - start
+                self.record_table(table, stats)
+            for entity in self.entities:
+                self.record_entity(entity, len(data[entity]))
+            yield data
+
+
+def ordered_fieldnames(declared: List[str], fieldnames: List[str]) -> list:
+    """Puts the fieldnames an entity was parsed with in the declared order of
+    Dataset.fieldnames, so that the order does not depend on the engine.
+    Fields that were not declared follow, in the order they were set.
+    """
+    found = set(fieldnames)
+    return [
+        field
+        for field in dict.fromkeys(declared + fieldnames)
+        if field in found
+    ]
+
+
+def parse_table(
+    table: Table,
+    engine: str = "row",
+    progress: bool = True,
+    sample: "Sample" = None,
+    folder: Path = None,
+) -> dict:
+    """Parses a single table on its own, as if no other table had been
+    parsed before it.
+
+    Args:
+        table (Table): The table to parse
+        engine (str, optional): "row" or "column". Defaults to "row".
+        progress (bool, optional): Whether to show a progress bar for rows.
+        sample (Sample, optional): A sample of households to parse the rows
+            of. Defaults to every household.
+        folder (Path, optional): The folder to read the TAB file from.
+            Defaults to the table's folder in the data folder.
+
+    Returns:
+        dict, dict, dict: The partial data of each entity the table feeds,
+        the fieldnames it produced, and the rows, bytes and seconds it took.
+    """
+    start = time.perf_counter()
+    path = table_path(table, folder)
+    if engine == "column":
+        line = read_columns(path, table.delimiter, used_columns(table), sample)
+        data, fieldnames = parse_table_columns(table, line)
+        return data, fieldnames, table_stats(path, data, len(line), start)
+    num_rows = 0
+    table_entities = table_entity_list(table)
+    fieldnames = declared_fieldnames(table)
+    data = {}
+    for entity in table_entities:
+        data[entity] = entity()
+    columns = used_columns(table)
+    pivot = issubclass(table, PivotTable)
+    lines = []
+    with open_text(path) as f:
+        selected = [
+            (i, name)
+            for i, name in enumerate(next(f).split("\t"))
+            if columns is None or name in columns
+        ]
+        first_line = True
+        for values in tqdm(
+            csv.reader(f, delimiter=table.delimiter),
+            desc="Reading " + table.filename,
+            disable=not progress,
+        ):
+            if not values:
+                continue
+            line = {name: values[i] for i, name in selected if i < len(values)}
+            if sample is not None:
+                line = sample.select_line(line)
+                if line is None:
+                    continue
+            num_rows += 1
+            if pivot:
+                # Pivot tables are grouped once every row has been read.
+                lines += [line]
+                continue
+            rows = [
+                data[entity].row(entity.id(line)) for entity in table_entities
+            ]
+            result = table.parse(*rows, SafeDict(line))
+            if not isinstance(result, tuple):
+                result = (result,)
+            for entity, row, res in zip(table_entities, rows, result):
+                if res is not row:
+                    for field, value in res.items():
+                        row[field] = value
+                if first_line:
+                    fieldnames[entity] += list(res.keys())
+            first_line = False
+    if pivot:
+        frame = pd.DataFrame(lines, columns=[name for _, name in selected])
+        pivoted, fieldnames = pivot_columns(
+            table, SafeColumns(to_numeric(frame))
+        )
+        for entity, columns in pivoted.items():
+            for identity, values in zip(
+                columns.index.tolist(), columns.to_numpy().tolist()
+            ):
+                row = data[entity].row(int(identity))
+                for field, value in zip(columns.columns, values):
+                    if value == value:
+                        row[field] = value
+    return data, fieldnames, table_stats(path, data, num_rows, start)
+
+
+def table_path(table: Table, folder: Path = None) -> Path:
+    """Returns the stored TAB file of a table, which may be compressed.
+    Tables are read from their folder in the data folder, unless another
+    folder is given.
+    """
+    if folder is None:
+        folder = resolve(table.folder)
+    return tab_path(folder, table.filename)
+
+
+def file_size(table: Table, folder: Path = None) -> int:
+    return table_path(table, folder).stat().st_size
+
+
+def table_stats(path: Path, data: dict, rows: int, start: float) -> dict:
+    return dict(
+        rows=rows,
+        bytes_read=Path(path).stat().st_size,
+        seconds=time.perf_counter() - start,
+        entity_rows={
+            entity.__name__.lower(): len(partial)
+            for entity, partial in data.items()
+        },
+    )
+
+
+def parse_table_columns(table: Table, line: "SafeColumns") -> dict:
+    """Parses the rows of a table read by the column engine.
+
+    Args:
+        table (Table): The table
+        line (SafeColumns): Some or all of the rows of its TAB file
+
+    Returns:
+        dict, dict: The partial data of each entity the table feeds, and the
+        fieldnames it produced.
+    """
+    if issubclass(table, PivotTable):
+        return pivot_columns(table, line)
+    fieldnames = declared_fieldnames(table)
+    data = {}
+    result = table.parse_columns(line)
+    if not isinstance(result, tuple):
+        result = (result,)
+    for entity, res in zip(table_entity_list(table), result):
+        res = pd.DataFrame(res, index=line.index)
+        data[entity] = reduce_columns(entity.ids(line), res, table.accumulate)
+        fieldnames[entity] += list(res.columns)
+    return data, fieldnames
+
+
+def pivot_columns(table: PivotTable, line: "SafeColumns") -> dict:
+    """Groups and pivots the rows of a PivotTable.
+
+    Args:
+        table (PivotTable): The table
+        line (SafeColumns): Some or all of the rows of its TAB file
+
+    Returns:
+        dict, dict: The columns of each entity the table feeds, indexed by
+        ID in order of first appearance, with missing values for fields an
+        entity has no rows for, and the fieldnames of each entity.
+    """
+    fieldnames = declared_fieldnames(table)
+    pairs = table.pivot(line)
+    # Fields are matched to columns once per distinct field, not per row.
+    factorized = [pd.factorize(field) for field, _ in pairs]
+    amounts = np.concatenate(
+        [np.asarray(amount, dtype=np.float64) for _, amount in pairs]
+    )
+    data = {}
+    for entity in table_entity_list(table):
+        ids = entity.ids(line).to_numpy()
+        index = pd.Index(pd.unique(ids))
+        columns = pd.Index(fieldnames[entity])
+        rows = np.tile(index.get_indexer(ids), len(pairs))
+        position = np.concatenate(
+            [
+                np.append(columns.get_indexer(uniques), -1)[codes]
+                for codes, uniques in factorized
+            ]
+        )
+        found = position >= 0
+        groups = rows[found] * len(columns) + position[found]
+        reduced = (
+            pd.Series(amounts[found])
+            .groupby(groups, sort=False)
+            .agg(table.reducer)
+        )
+        values = np.full(len(index) * len(columns), np.nan)
+        values[reduced.index.to_numpy()] = reduced.to_numpy()
+        data[entity] = pd.DataFrame(
+            values.reshape(len(index), len(columns)),
+            index=index,
+            columns=columns,
+        )
+    return data, fieldnames
+
+
+@lru_cache(maxsize=None)
+def used_columns(table: Table) -> frozenset:
+    """Returns the TAB file columns a table reads: those it declares in
+    source_columns, those its mapping reads, or else those its
+    parse_columns and entity IDs read.
+
+    Args:
+        table (Table): The table
+
+    Returns:
+        frozenset: The column names, or None if they could not be found, in
+        which case every column should be read
+    """
+    if table.source_columns is not None:
+        return frozenset(table.source_columns) | {"sernum"}
+    if issubclass(table, MappedTable):
+        return frozenset().union(
+            *(plan.columns for plan in mapping_plans(table)),
+            *(entity.id_columns for entity in table_entity_list(table)),
+            {"sernum"},
+        )
+    line = RecordingColumns(pd.DataFrame(index=pd.RangeIndex(0)))
+    try:
+        if issubclass(table, PivotTable):
+            table.pivot(line)
+        else:
+            table.parse_columns(line)
+    except NotImplementedError:
+        return None
+    for entity in table_entity_list(table):
+        entity.ids(line)
+    return frozenset(line.names) | {"sernum"}
+
+
+def table_entity_list(table: Table) -> list:
+    if isinstance(table.entity, list):
+        return table.entity
+    return [table.entity]
+
+
+def declared_fieldnames(table: Table) -> dict:
+    fieldnames = {}
+    for entity in table_entity_list(table):
+        fieldnames[entity] = []
+        if isinstance(table.fieldnames, list):
+            fieldnames[entity] += table.fieldnames
+        elif isinstance(table.fieldnames, dict):
+            fieldnames[entity] += table.fieldnames[entity]
+    return fieldnames
+
+
+class EntityRow:
+    """One row of an Entity, read and written by field name like a SafeDict:
+    reading a field that is unset or not numeric gives zero.
+    """
+
+    __slots__ = ("entity", "row")
+
+    def __init__(self, entity: Entity, row: int):
+        self.entity = entity
+        self.row = row
+
+    def __getitem__(self, field: str) -> float:
+        return self.entity.get(self.row, field)
+
+    def __setitem__(self, field: str, value):
+        self.entity.set(self.row, field, value)
+
+    def __contains__(self, field: str) -> bool:
+        present = self.entity.present.get(field)
+        return present is not None and present[self.row]
+
+    def keys(self) -> list:
+        return [field for field in self.entity.columns if field in self]
+
+    def items(self) -> list:
+        return [
+            (field, self.entity.columns[field][self.row])
+            for field in self.keys()
+        ]
+
+
+def value_dtype(value) -> np.dtype:
+    if isinstance(value, (bool, np.bool_)):
+        return np.dtype(bool)
+    if isinstance(value, (int, np.integer)):
+        return np.dtype(np.int64)
+    if isinstance(value, (float, np.floating)):
+        return np.dtype(float)
+    return np.dtype(object)
+
 
 class SafeDict(dict):
     def __getitem__(self, item):
@@ -111,3 +822,264 @@ class SafeDict(dict):
             return float(super().__getitem__(item))
         except:
             return 0
+
+
+class SafeColumns:
+    """Column-wise counterpart of SafeDict: every column is numeric, with
+    non-numeric values and missing columns read as zero.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+
+    @property
+    def index(self) -> pd.Index:
+        return self.frame.index
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __getitem__(self, item) -> pd.Series:
+        if item in self.frame:
+            return self.frame[item]
+        return pd.Series(0.0, index=self.frame.index)
+
+
+class RecordingColumns(SafeColumns):
+    """A SafeColumns that records the names of the columns read from it."""
+
+    def __init__(self, frame: pd.DataFrame):
+        super().__init__(frame)
+        self.names = set()
+
+    def __getitem__(self, item) -> pd.Series:
+        self.names.add(item)
+        return super().__getitem__(item)
+
+
+def read_columns(
+    path: Path,
+    delimiter: str = "\t",
+    columns: frozenset = None,
+    sample: "Sample" = None,
+) -> SafeColumns:
+    """Reads a TAB file into numeric columns.
+
+    Args:
+        path (Path): The path to the TAB file
+        delimiter (str, optional): The field delimiter. Defaults to tab.
+        columns (frozenset, optional): The columns to read. Others are
+            skipped without being converted. Defaults to all.
+        sample (Sample, optional): A sample of households to keep the rows
+            of. Other rows are dropped before being converted. Defaults to
+            every household.
+
+    Returns:
+        SafeColumns: The columns of the file
+    """
+    frame = pd.read_csv(**read_options(path, delimiter, columns))
+    if sample is not None:
+        frame = sample.select(frame)
+    return SafeColumns(to_numeric(frame))
+
+
+def iter_columns(
+    path: Path,
+    delimiter: str = "\t",
+    rows: int = 100000,
+    columns: frozenset = None,
+    sample: "Sample" = None,
+):
+    """Reads a TAB file into numeric columns, a block of rows at a time.
+
+    Args:
+        path (Path): The path to the TAB file
+        delimiter (str, optional): The field delimiter. Defaults to tab.
+        rows (int, optional): The number of rows in each block.
+        columns (frozenset, optional): The columns to read. Defaults to all.
+        sample (Sample, optional): A sample of households to keep the rows
+            of. Defaults to every household.
+
+    Yields:
+        pd.DataFrame: The numeric columns of each block
+    """
+    with pd.read_csv(
+        **read_options(path, delimiter, columns), chunksize=rows
+    ) as f:
+        for frame in f:
+            if sample is not None:
+                frame = sample.select(frame)
+            yield to_numeric(frame)
+
+
+def read_options(
+    path: Path, delimiter: str, columns: frozenset = None
+) -> dict:
+    with open_text(path) as f:
+        names = next(f).split("\t")
+    return dict(
+        filepath_or_buffer=path,
+        sep=delimiter,
+        names=names,
+        usecols=(
+            None
+            if columns is None
+            else [i for i, name in enumerate(names) if name in columns]
+        ),
+        header=None,
+        skiprows=1,
+        encoding="utf-8",
+        # Compressed files are decompressed as they are read instead.
+        memory_map=compression_of(path) is None,
+        low_memory=False,
+        float_precision="round_trip",
+    )
+
+
+def to_numeric(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.apply(pd.to_numeric, errors="coerce")
+    return frame.fillna(0).astype(np.float64)
+
+
+class TableStream:
+    """Reads a table's TAB file in order of sernum, a block of households at
+    a time. FRS TAB files are sorted by sernum, so every row of a household
+    is read together.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        rows: int = 100000,
+        sample: "Sample" = None,
+        folder: Path = None,
+    ):
+        self.table = table
+        self.reader = iter_columns(
+            table_path(table, folder),
+            table.delimiter,
+            rows,
+            used_columns(table),
+            sample,
+        )
+        self.buffer = None
+        self.done = False
+
+    def fill(self):
+        try:
+            frame = next(self.reader)
+        except StopIteration:
+            self.done = True
+            return
+        sernum = frame["sernum"]
+        if not sernum.is_monotonic_increasing or (
+            self.buffer is not None
+            and len(self.buffer)
+            and len(frame)
+            and self.buffer["sernum"].iloc[-1] > sernum.iloc[0]
+        ):
+            raise ValueError(f"{self.table.filename} is not sorted by sernum.")
+        if self.buffer is None:
+            self.buffer = frame
+        else:
+            self.buffer = pd.concat([self.buffer, frame])
+
+    def boundary(self, households: int) -> float:
+        """Returns the sernum of the household that ends the next block of
+        households, or None if the file has been read.
+        """
+        while not self.done and (
+            self.buffer is None
+            or self.buffer["sernum"].nunique() <= households
+        ):
+            self.fill()
+        if self.buffer is None or not len(self.buffer):
+            return None
+        sernums = pd.unique(self.buffer["sernum"])
+        return sernums[min(households, len(sernums)) - 1]
+
+    def take(self, boundary: float) -> SafeColumns:
+        """Removes and returns the rows of every household up to and
+        including the given sernum.
+        """
+        while not self.done and (
+            self.buffer is None
+            or not len(self.buffer)
+            or self.buffer["sernum"].iloc[-1] <= boundary
+        ):
+            self.fill()
+        if self.buffer is None:
+            return SafeColumns(pd.DataFrame())
+        selected = (self.buffer["sernum"] <= boundary).to_numpy()
+        rows = self.buffer[selected]
+        self.buffer = self.buffer[~selected]
+        return SafeColumns(rows)
+
+
+def reduce_columns(
+    ids: pd.Series, values: pd.DataFrame, accumulate: List[str] = []
+) -> pd.DataFrame:
+    """Reduces the per-row results of a table to one row per entity,
+    matching the row engine: IDs are kept in order of first appearance, the
+    last row to set a field wins, and accumulated fields are summed in row
+    order.
+
+    Args:
+        ids (pd.Series): The entity ID of each row
+        values (pd.DataFrame): The fields set by each row
+        accumulate (List[str], optional): Fields to add rather than set.
+
+    Returns:
+        pd.DataFrame: The fields of each entity, indexed by ID
+    """
+    ids = ids.to_numpy()
+    index = pd.Index(pd.unique(ids))
+    positions = index.get_indexer(ids)
+    unique = len(index) == len(ids)
+    reduced = {}
+    for field in values.columns:
+        value = values[field].set_axis(ids)
+        if field in accumulate:
+            total = np.zeros(len(index))
+            np.add.at(total, positions, value.to_numpy(dtype=np.float64))
+            reduced[field] = total
+            continue
+        if is_integer_dtype(value.dtype):
+            value = value.astype("Int64")
+        if not unique:
+            value = value[value.notna()]
+            value = value[~value.index.duplicated(keep="last")]
+            value = value.reindex(index)
+        reduced[field] = value
+    return pd.DataFrame(reduced, index=index)
+
+
+def merge_columns(
+    data: pd.DataFrame, partial: pd.DataFrame, accumulate: List[str] = []
+) -> pd.DataFrame:
+    """Merges a table's reduced results into an entity's columns: new IDs
+    are appended, later tables override earlier ones, and accumulated
+    fields are added to any existing value.
+
+    Args:
+        data (pd.DataFrame): The entity's columns, indexed by ID
+        partial (pd.DataFrame): The table's results, indexed by ID
+        accumulate (List[str], optional): Fields to add rather than set.
+
+    Returns:
+        pd.DataFrame: The updated entity columns
+    """
+    new_ids = partial.index.difference(data.index, sort=False)
+    data = data.reindex(data.index.append(new_ids))
+    touched = data.index.isin(partial.index)
+    columns = {field: data[field] for field in data.columns}
+    for field in partial.columns:
+        value = partial[field].reindex(data.index)
+        if field not in columns:
+            columns[field] = value
+        elif field in accumulate:
+            total = columns[field].fillna(0) + value
+            columns[field] = columns[field].where(~touched, total)
+        else:
+            columns[field] = value.where(value.notna(), columns[field])
+    return pd.DataFrame(columns, index=data.index)
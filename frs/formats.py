@@ -0,0 +1,291 @@
+import numpy as np
+import os
+import pandas as pd
+import shutil
+from pathlib import Path
+from typing import List
+from frs.dataset import Entity
+from frs.utils import ENTITIES, FORMATS, LOAD_ORDER, output_path
+
+
+def entity_frame(
+    data, fieldnames: List[str], dtypes: dict = {}
+) -> pd.DataFrame:
+    """Builds the output DataFrame of an entity, filling fields an entity
+    never set with zero as the CSV writer does.
+
+    Args:
+        data (Entity or pd.DataFrame): The parsed entity
+        fieldnames (List[str]): The output columns
+        dtypes (dict, optional): The declared dtype of each field.
+
+    Returns:
+        pd.DataFrame: The entity's rows, with a default index
+    """
+    if isinstance(data, Entity):
+        return apply_dtypes(data.to_frame(fieldnames), dtypes)
+    data = data.reindex(columns=fieldnames).reset_index(drop=True)
+    for field in fieldnames:
+        column = data[field]
+        if column.isna().all():
+            data[field] = 0
+            continue
+        if column.hasnans:
+            if column.dtype != np.float64:
+                column = column.astype(object)
+            column = column.fillna(0)
+        if column.dtype == "Int64":
+            column = column.astype(np.int64)
+        data[field] = column
+    return apply_dtypes(data, dtypes)
+
+
+def apply_dtypes(frame: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Converts the columns of a DataFrame to their declared dtypes, checking
+    that integer columns fit their type.
+
+    Args:
+        frame (pd.DataFrame): The DataFrame
+        dtypes (dict): The declared dtype of each field
+
+    Returns:
+        pd.DataFrame: The converted DataFrame
+    """
+    for field, dtype in dtypes.items():
+        if field not in frame:
+            continue
+        column = frame[field]
+        if column.dtype == dtype:
+            continue
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if dtype.kind in "iu":
+            values = column.to_numpy(dtype=np.float64)
+            info = np.iinfo(dtype)
+            if (
+                (values != np.round(values)).any()
+                or (values < info.min).any()
+                or (values > info.max).any()
+            ):
+                raise ValueError(f"{field} cannot be stored as {dtype}.")
+        frame[field] = column.astype(dtype)
+    return frame
+
+
+def dtype_to_json(dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return dict(categories=list(dtype.categories))
+    return str(pd.api.types.pandas_dtype(dtype))
+
+
+def dtype_from_json(dtype):
+    if isinstance(dtype, dict):
+        return pd.CategoricalDtype(dtype["categories"])
+    return pd.api.types.pandas_dtype(dtype)
+
+
+def remove_entity(folder: Path, name: str):
+    """Removes an entity's outputs in every format."""
+    for format in FORMATS:
+        path = output_path(folder, name, format)
+        if path.is_dir():
+            shutil.rmtree(path)
+        elif path.exists():
+            path.unlink()
+
+
+def write_entity(
+    frame: pd.DataFrame,
+    folder: Path,
+    name: str,
+    format: str,
+    append: bool = False,
+):
+    """Writes an entity's DataFrame in one of FORMATS.
+
+    Args:
+        frame (pd.DataFrame): The entity, from entity_frame
+        folder (Path): The output folder
+        name (str): The entity name, e.g. "person"
+        format (str): The output format
+        append (bool, optional): Whether to append the rows to an existing
+            output. Only CSV outputs can be appended to.
+    """
+    path = output_path(folder, name, format)
+    if format == "csv":
+        header = not (append and path.exists())
+        text = csv_text(frame, header)
+        if text is None:
+            frame.to_csv(
+                path,
+                mode="a" if append else "w",
+                header=header,
+                index=False,
+                encoding="utf-8",
+            )
+            return
+        with open(path, "a" if append else "w", encoding="utf-8") as f:
+            f.write(text)
+        return
+    if append:
+        raise ValueError(f"Cannot append to {format} outputs.")
+    frame = frame.infer_objects()
+    for field in frame.columns[frame.dtypes == object]:
+        frame[field] = frame[field].astype(str)
+    if format == "parquet":
+        frame.to_parquet(path, index=False)
+    elif format == "feather":
+        frame.to_feather(path)
+    elif format == "npy":
+        path.mkdir(parents=True, exist_ok=True)
+        for field in frame.columns:
+            values = frame[field].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            np.save(path / f"{field}.npy", values, allow_pickle=False)
+    else:
+        raise ValueError(f"Unknown output format: {format}")
+
+
+# Characters that make the CSV writer quote a field.
+CSV_SPECIAL = [",", '"', "\r", "\n"]
+
+
+def csv_text(frame: pd.DataFrame, header: bool = True) -> str:
+    """Formats a DataFrame as the CSV text DataFrame.to_csv writes, a whole
+    column at a time: each column's distinct values are formatted once, and
+    rows are joined from the formatted columns.
+
+    Args:
+        frame (pd.DataFrame): The DataFrame
+        header (bool, optional): Whether to start with a header line.
+            Defaults to True.
+
+    Returns:
+        str: The CSV text, or None if the DataFrame has columns of other
+        types than numbers, booleans and categories, or text that needs
+        quoting, which are left to DataFrame.to_csv.
+    """
+    columns = [csv_column(frame[field]) for field in frame.columns]
+    names = [str(field) for field in frame.columns]
+    if any(column is None for column in columns) or any(
+        char in name for name in names for char in CSV_SPECIAL
+    ):
+        return None
+    if len(columns) == 1 and "" in columns[0]:
+        # A line holding only an empty field is written quoted.
+        return None
+    lines = list(map(",".join, zip(*columns))) if len(frame) else []
+    if header:
+        lines.insert(0, ",".join(names))
+    if not lines:
+        return ""
+    return os.linesep.join(lines) + os.linesep
+
+
+def csv_column(column: pd.Series) -> list:
+    """Formats a column's values as DataFrame.to_csv does, with missing
+    values left empty.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        labels = [str(label) for label in column.cat.categories]
+        if any(char in label for label in labels for char in CSV_SPECIAL):
+            return None
+        return np.array(labels + [""], dtype=object)[
+            column.cat.codes.to_numpy()
+        ].tolist()
+    values = column.to_numpy()
+    if values.dtype == bool:
+        return np.where(values, "True", "False").astype(object).tolist()
+    if values.dtype.kind not in "iuf":
+        return None
+    if values.dtype.kind == "f":
+        # Distinct values are taken on the bit pattern, as -0.0 and 0.0 are
+        # equal but written differently.
+        _, first, inverse = np.unique(
+            values.view(f"i{values.itemsize}"),
+            return_index=True,
+            return_inverse=True,
+        )
+        unique = values[first]
+    else:
+        unique, inverse = np.unique(values, return_inverse=True)
+    # Python's repr gives the same text as NumPy's str for float64 values,
+    # which to_csv uses, and is faster.
+    if values.dtype == np.float64 or values.dtype.kind in "iu":
+        labels = np.array(list(map(repr, unique.tolist())), dtype=object)
+    else:
+        labels = unique.astype(str).astype(object)
+    if values.dtype.kind == "f":
+        labels[np.isnan(unique)] = ""
+    return labels[inverse.reshape(-1)].tolist()
+
+
+def read_entity(
+    folder: Path,
+    name: str,
+    columns: List[str] = None,
+    order: List[str] = None,
+    dtypes: dict = {},
+    mmap: bool = False,
+) -> pd.DataFrame:
+    """Reads an entity's DataFrame, preferring binary formats over CSV.
+
+    Args:
+        folder (Path): The output folder
+        name (str): The entity name, e.g. "person"
+        columns (List[str], optional): The columns to read. Defaults to all.
+        order (List[str], optional): The column order of .npy outputs.
+            Defaults to alphabetical order.
+        dtypes (dict, optional): The declared dtype of each field.
+        mmap (bool, optional): Whether to memory-map the .npy outputs rather
+            than read them, so that processes loading the same entity share
+            its memory. The columns are then read-only.
+
+    Returns:
+        pd.DataFrame: The entity
+    """
+    for format in ["npy"] if mmap else LOAD_ORDER:
+        path = output_path(folder, name, format)
+        if not path.exists():
+            continue
+        if format == "parquet":
+            frame = pd.read_parquet(path, columns=columns)
+        elif format == "feather":
+            frame = pd.read_feather(path, columns=columns)
+        elif format == "npy":
+            if columns is None:
+                columns = order
+            if columns is None:
+                columns = sorted(file.stem for file in path.glob("*.npy"))
+            data = {}
+            for field in columns:
+                if not (path / f"{field}.npy").exists():
+                    raise KeyError(f"{field} is not a column of {name}.")
+                data[field] = np.load(
+                    path / f"{field}.npy",
+                    mmap_mode="r" if mmap else None,
+                    allow_pickle=False,
+                )
+            frame = pd.DataFrame(data, copy=not mmap)
+        else:
+            frame = pd.read_csv(
+                path,
+                usecols=columns,
+                dtype={
+                    field: dtype
+                    for field, dtype in dtypes.items()
+                    if columns is None or field in columns
+                },
+                low_memory=False,
+                # Reads back exactly the floats written, as the binary
+                # formats do.
+                float_precision="round_trip",
+            )
+            if columns is not None:
+                frame = frame[columns]
+        return apply_dtypes(frame, dtypes)
+    if mmap:
+        raise FileNotFoundError(
+            f"No npy output of {name} found in {folder} to memory-map."
+        )
+    raise FileNotFoundError(f"No {name} dataset found in {folder}.")
@@ -1,19 +1,38 @@
-from csv import DictWriter
-from frs.utils import resolve, clean_dirs, ensure_folders_exist
+# pandas, requests and the tables are slow to import, so they are imported
+# only by the functions that use them: commands such as 'frs status' do not
+# need them.
+from __future__ import annotations
+from frs.utils import (
+    ENTITIES,
+    FORMATS,
+    PARTITION_COLUMNS,
+    resolve,
+    clean_dirs,
+    filter_values,
+    ensure_folders_exist,
+    output_path,
+    stored_years,
+    year_data,
+    year_folder,
+)
 import os
 import argparse
-from colorama import init, Fore
 from termcolor import colored
-import webbrowser
 import json
+import time
 import warnings
-from tqdm import tqdm
 import shutil
 from pathlib import Path
-from frs.dataset import Dataset
-from frs.tables import tables
-import pandas as pd
-import requests
+from frs.cache import LOAD_CACHE, file_signature
+from frs.profiling import rate, report, size_of
+from frs.sources import (
+    describe_sources,
+    entity_names,
+    recorded_sources,
+    stale_entities,
+)
+from frs.storage import STORE_MODES, tab_path
+from typing import Dict, List
 
 __version__ = "0.2.0"
 
@@ -24,7 +43,7 @@ def get_args():
     )
     parser.add_argument(
         "mode",
-        choices=["status", "gen", "regen", "show"],
+        choices=["status", "gen", "regen", "show", "benchmark", "validate"],
         help="The action to take on stored data",
     )
     parser.add_argument(
@@ -36,14 +55,106 @@ def get_args():
         action="store_true",
         help="Whether to download a small synthetic example output dataset instead of loading in microdata",
     )
+    parser.add_argument(
+        "--engine",
+        choices=["column", "row"],
+        default="column",
+        help="Whether to parse the TAB files as whole columns or row by row",
+    )
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        choices=FORMATS,
+        default=["csv"],
+        help="The formats to write the generated datasets in",
+    )
+    parser.add_argument(
+        "--store",
+        choices=STORE_MODES,
+        default="copy",
+        help="How to store the TAB files: copied, linked to in place, or compressed",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Whether to rebuild every dataset, even those that are up to date",
+    )
+    parser.add_argument(
+        "--households",
+        type=int,
+        required=False,
+        help="Generate in blocks of this many households, to bound memory use",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of processes to parse TAB files in",
+    )
+    parser.add_argument(
+        "--sample",
+        type=float,
+        required=False,
+        help="Generate from this fraction of households, sampled within each region, with weights scaled up to match",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="The random seed of the household sample",
+    )
+    parser.add_argument(
+        "--partition",
+        choices=PARTITION_COLUMNS,
+        required=False,
+        help="Also write the generated datasets split by this household column, so that frs.load(filter=...) reads only the matching households",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Whether to check the generated datasets' IDs, weights and values",
+    )
+    parser.add_argument(
+        "--perf",
+        action="store_true",
+        help="Whether to show the time taken by each table and entity in the last generation",
+    )
+    parser.add_argument(
+        "--year",
+        type=int,
+        required=False,
+        help="The survey year to store or use, so that several years can be stored side by side",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        nargs="+",
+        default=[1],
+        help="The sizes of the synthetic surveys to benchmark, in years of the FRS",
+    )
+    parser.add_argument(
+        "--output",
+        required=False,
+        help="The file to write benchmark results to, instead of printing them",
+    )
     args = parser.parse_args()
     return args
 
 
-def run_status():
-    tab_files = os.listdir(resolve("tab"))
-    csv_files = os.listdir(resolve("csv"))
+def run_status(perf: bool = False, years: List[int] = None):
+    # Status only reads the data folder, so missing folders are not created.
+    tab_files, csv_files = [
+        os.listdir(resolve(name)) if resolve(name).is_dir() else []
+        for name in ("tab", "csv")
+    ]
     print("FRS status:")
+    if years is None:
+        years = stored_years()
+    if years:
+        print(
+            "\tSurvey years stored (use --year):\t\t"
+            + ", ".join(map(str, years))
+        )
     print("\tFRS TAB files stored?\t\t\t\t", end="")
     if tab_files:
         print(colored("Yes", "green"))
@@ -72,9 +183,147 @@ def run_status():
             )
     else:
         print(colored("N/A", "yellow"))
+    metadata = read_metadata()
+    if csv_files and "entities" in metadata:
+        stale = find_stale(
+            metadata,
+            recorded_sources(metadata),
+            metadata.get("formats", ["csv"]),
+            metadata.get("sample"),
+        )
+        print("\tOpenFisca-UK input files stale?\t\t\t", end="")
+        if not stale:
+            print(colored("No", "green"))
+        else:
+            print(colored("Yes", "red"))
+            for name, reasons in stale.items():
+                print(f"\t\t{name}: {', '.join(reasons)}")
+    if metadata.get("sample"):
+        print(
+            "\tOpenFisca-UK input files sampled?\t\t"
+            + colored("Yes", "yellow")
+            + f" ({metadata['sample']['fraction']:.1%} of households, "
+            f"seed {metadata['sample']['seed']})"
+        )
+    if metadata.get("partition"):
+        print(
+            "\tOpenFisca-UK input files partitioned?\t\t"
+            + colored("Yes", "green")
+            + f" (by {metadata['partition']})"
+        )
+    if perf:
+        print_profile(metadata.get("profile"))
+
+
+def print_profile(profile: dict):
+    """Prints the statistics recorded by the last generation."""
+    if not profile:
+        print("No generation profile recorded.")
+        return
+    print(
+        f"Last generation ({profile['engine']} engine, "
+        f"{profile['workers']} workers): {profile['seconds']:.2f}s"
+    )
+    row = "\t{:<20}{:>10}{:>10}{:>12}{:>12}"
+    print(row.format("Table", "Rows", "Seconds", "Rows/s", "MB read"))
+    for name, stats in profile["tables"].items():
+        print(
+            row.format(
+                name,
+                stats["rows"],
+                f"{stats['seconds']:.3f}",
+                f"{stats['rows_per_second'] or 0:.0f}",
+                f"{stats['bytes_read'] / 1e6:.1f}",
+            )
+        )
+    print(row.format("Output", "Rows", "Seconds", "Rows/s", "MB written"))
+    for name, stats in profile["entities"].items():
+        for format, output in stats.get("outputs", {}).items():
+            print(
+                row.format(
+                    f"{name}.{format}",
+                    output["rows"],
+                    f"{output['seconds']:.3f}",
+                    f"{output['rows_per_second'] or 0:.0f}",
+                    f"{output['bytes_written'] / 1e6:.1f}",
+                )
+            )
+
+
+def read_metadata(folder: Path = None) -> dict:
+    """Reads the metadata of the last generation in a data folder, or in the
+    data folder if none is given.
+    """
+    path = (
+        resolve("metadata.json")
+        if folder is None
+        else folder / ("metadata.json")
+    )
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def find_stale(
+    metadata: dict, sources: dict, formats: List[str], sample: dict = None
+) -> dict:
+    """Finds the entity datasets that need rebuilding, and why.
+
+    Args:
+        metadata (dict): The metadata of the last generation
+        sources (dict): The current sources, from describe_sources
+        formats (List[str]): The formats each dataset should exist in
+        sample (dict, optional): The fraction and seed of the household
+            sample the datasets should be generated from, and the TAB file
+            it is drawn from. Defaults to None, for every household.
+
+    Returns:
+        dict: The reasons each stale entity needs rebuilding
+    """
+    stale = stale_entities(metadata, sources)
+    sample_changed = False
+    if sample is not None:
+        # Every entity keeps only the sampled households, so a change to the
+        # file they are sampled from changes them all.
+        file = sources["files"].get(sample.get("file"))
+        old_file = metadata.get("files", {}).get(sample.get("file"))
+        sample_changed = (
+            file is None
+            or old_file is None
+            or file["hash"] != old_file["hash"]
+        )
+    for name in sources["entities"]:
+        reasons = []
+        if metadata.get("version") != __version__:
+            reasons += [f"generated with version {metadata.get('version')}"]
+        if metadata.get("sample") != sample:
+            reasons += ["household sample changed"]
+        elif sample_changed and f"{sample['file']} changed" not in stale.get(
+            name, []
+        ):
+            reasons += [f"{sample['file']} changed (sampled households)"]
+        for format in formats:
+            if not output_path(resolve("csv"), name, format).exists():
+                reasons += [f"no {format} output"]
+        if reasons:
+            stale[name] = reasons + stale.get(name, [])
+    return stale
+
+
+def import_files(path: Path, mode: str = "copy", workers: int = 1):
+    """Stores the TAB files in a folder.
 
+    Args:
+        path (Path): The folder of TAB files
+        mode (str, optional): "copy" to copy them, "hardlink" or "symlink"
+            to link to them in place, or "gzip", "lzma" or "zstd" to store
+            them compressed. Defaults to "copy".
+        workers (int, optional): The number of files to store at once.
+            Defaults to 1.
+    """
+    from frs.storage import store_files
 
-def import_files(path: Path):
     filenames = [
         filename
         for filename in os.listdir(path)
@@ -83,31 +332,314 @@ def import_files(path: Path):
     if not filenames:
         print("No FRS files were found.")
         return
-    for filename in tqdm(filenames, desc="Storing FRS files"):
-        shutil.copyfile(
-            path / filename,
-            resolve("tab") / filename,
-        )
+    store_files(
+        [path / filename for filename in filenames],
+        resolve("tab"),
+        mode,
+        workers,
+    )
     print("Stored FRS source files successfully.")
 
 
-def generate_csv(path: Path = resolve("tab")):
-    dataset = Dataset(tables)
-    entity_data, fieldnames = dataset.parse()
-    for entity, data in entity_data.items():
-        name = entity.__name__.lower() + ".csv"
-        with open(
-            resolve("csv") / name, "w", encoding="utf-8", newline=""
-        ) as f:
-            writer = DictWriter(f, fieldnames=fieldnames[entity])
-            writer.writeheader()
-            for item in tqdm(data.entries.values(), desc=f"Writing {name}"):
-                for field in fieldnames[entity]:
-                    if field not in item:
-                        item[field] = 0
-                writer.writerow(item)
+def generate_csv(
+    path: Path = resolve("tab"),
+    engine: str = "column",
+    workers: int = 1,
+    formats: List[str] = ["csv"],
+    full: bool = False,
+    households: int = None,
+    sample: float = None,
+    seed: int = 0,
+    validate: bool = False,
+    partition: str = None,
+):
+    from frs.dataset import Dataset
+    from frs.formats import dtype_to_json
+    from frs.sample import Sample
+    from frs.tables import tables
+    from frs.tables.household import HHold
+
+    metadata = read_metadata()
+    sources = describe_sources(tables, metadata)
+    sampling = (
+        None
+        if sample is None
+        else dict(fraction=sample, seed=seed, file=HHold.filename)
+    )
+    if full:
+        stale = {name: ["full rebuild"] for name in sources["entities"]}
+    else:
+        stale = find_stale(metadata, sources, formats, sampling)
+    if not stale:
+        if not resolve("csv/membership").exists():
+            write_membership()
+        if metadata.get("partition") != partition or (
+            partition and not resolve("csv/partitions").exists()
+        ):
+            write_partition_outputs(partition, formats)
+            metadata["partition"] = partition
+            with open(resolve("metadata.json"), "w+") as f:
+                json.dump(metadata, f)
+        print("OpenFisca-UK input datasets are up to date.")
+        if validate:
+            check_datasets(dict(zip(ENTITIES, load())))
+        return
+    for name, reasons in stale.items():
+        print(f"Rebuilding {name} ({', '.join(reasons)})")
+    LOAD_CACHE.clear()
+    if sample is not None:
+        sample = Sample.draw(
+            tab_path(resolve(HHold.folder), HHold.filename), sample, seed
+        )
+    dataset = Dataset(
+        [table for table in tables if set(entity_names(table)) & set(stale)],
+        sample=sample,
+    )
+    dtypes = dataset.dtypes()
+    start = time.perf_counter()
+    if households:
+        fieldnames, outputs = stream_outputs(
+            dataset, stale, formats, households, dtypes
+        )
+    else:
+        entity_data, fieldnames = dataset.parse(engine=engine, workers=workers)
+        outputs = write_outputs(
+            entity_data, fieldnames, stale, formats, dtypes
+        )
+    profile = dict(
+        seconds=time.perf_counter() - start,
+        engine=engine,
+        workers=workers,
+        households=households,
+        **dataset.profile,
+    )
+    for name, entity_outputs in outputs.items():
+        for format, stats in entity_outputs.items():
+            stats["bytes_written"] = size_of(
+                output_path(resolve("csv"), name, format)
+            )
+            stats["rows_per_second"] = rate(stats["rows"], stats["seconds"])
+            report("output", f"{name}.{format}", stats)
+        profile["entities"][name]["outputs"] = entity_outputs
+    columns = {
+        name: fields
+        for name, fields in metadata.get("columns", {}).items()
+        if name in sources["entities"]
+    }
+    column_dtypes = {
+        name: fields
+        for name, fields in metadata.get("dtypes", {}).items()
+        if name in sources["entities"]
+    }
+    for entity, names in fieldnames.items():
+        name = entity.__name__.lower()
+        if name in stale:
+            columns[name] = names
+            column_dtypes[name] = {
+                field: dtype_to_json(dtype)
+                for field, dtype in dtypes[entity].items()
+            }
+    write_membership()
     with open(resolve("metadata.json"), "w+") as f:
-        json.dump(dict(version=__version__), f)
+        json.dump(
+            dict(
+                version=__version__,
+                formats=formats,
+                columns=columns,
+                dtypes=column_dtypes,
+                profile=profile,
+                sample=sampling,
+                partition=partition,
+                **sources,
+            ),
+            f,
+        )
+    write_partition_outputs(partition, formats)
+    if validate:
+        check_datasets(dict(zip(ENTITIES, load())))
+
+
+def check_datasets(datasets: Dict[str, pd.DataFrame]) -> bool:
+    """Validates datasets, printing any problems found.
+
+    Args:
+        datasets (Dict[str, pd.DataFrame]): The dataset of each entity
+
+    Returns:
+        bool: Whether the datasets passed
+    """
+    from frs.validation import validate
+
+    start = time.perf_counter()
+    problems = validate(datasets)
+    seconds = time.perf_counter() - start
+    if not problems:
+        print(colored("Validation passed", "green") + f" ({seconds:.2f}s).")
+        return True
+    print(
+        colored(f"Validation found {len(problems)} problem(s)", "red")
+        + f" ({seconds:.2f}s):"
+    )
+    for problem in problems:
+        print(f"\t{problem}")
+    return False
+
+
+def write_outputs(
+    entity_data: dict,
+    fieldnames: dict,
+    stale: dict,
+    formats: List[str],
+    dtypes: dict = {},
+):
+    """Writes the parsed data of each stale entity in every format, writing
+    the entities at the same time in separate threads.
+
+    Returns:
+        dict: The rows written and time taken for each entity and format
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from frs.formats import entity_frame, remove_entity, write_entity
+
+    folder = resolve("csv")
+
+    def write(entity: type) -> dict:
+        name = entity.__name__.lower()
+        remove_entity(folder, name)
+        outputs = {}
+        start = time.perf_counter()
+        frame = entity_frame(
+            entity_data[entity], fieldnames[entity], dtypes.get(entity, {})
+        )
+        build_seconds = time.perf_counter() - start
+        for format in formats:
+            start = time.perf_counter()
+            write_entity(frame, folder, name, format)
+            outputs[format] = dict(
+                rows=len(frame),
+                seconds=build_seconds + time.perf_counter() - start,
+            )
+        return outputs
+
+    entities = [
+        entity for entity in entity_data if entity.__name__.lower() in stale
+    ]
+    # Printed here rather than in the threads, whose lines could interleave.
+    for entity in entities:
+        for format in formats:
+            print(f"Writing {entity.__name__.lower()} ({format})")
+    with ThreadPoolExecutor(max_workers=max(len(entities), 1)) as executor:
+        return dict(
+            zip(
+                [entity.__name__.lower() for entity in entities],
+                executor.map(write, entities),
+            )
+        )
+
+
+def stream_outputs(
+    dataset: Dataset,
+    stale: dict,
+    formats: List[str],
+    households: int,
+    dtypes: dict = {},
+) -> dict:
+    """Parses and writes each stale entity a block of households at a time,
+    appending each block's rows to the CSV outputs.
+
+    Returns:
+        dict, dict: The fieldnames of each entity, and the rows written and
+        time taken for each entity's CSV file
+    """
+    from tqdm import tqdm
+    from frs.formats import entity_frame, remove_entity, write_entity
+
+    if formats != ["csv"]:
+        raise ValueError("Streaming generation only writes CSV files.")
+    fieldnames = dataset.fieldnames()
+    outputs = {}
+    for name in stale:
+        remove_entity(resolve("csv"), name)
+        outputs[name] = dict(csv=dict(rows=0, seconds=0))
+    for entity_data in tqdm(
+        dataset.stream(households),
+        desc=f"Generating in blocks of {households} households",
+        unit="block",
+    ):
+        for entity, data in entity_data.items():
+            name = entity.__name__.lower()
+            if name not in stale:
+                continue
+            start = time.perf_counter()
+            frame = entity_frame(
+                data, fieldnames[entity], dtypes.get(entity, {})
+            )
+            write_entity(frame, resolve("csv"), name, "csv", append=True)
+            outputs[name]["csv"]["rows"] += len(frame)
+            outputs[name]["csv"]["seconds"] += time.perf_counter() - start
+    return fieldnames, outputs
+
+
+# The columns linking each entity to the others.
+ID_COLUMNS = {
+    "person": ["person_id", "benunit_id", "household_id"],
+    "benunit": ["benunit_id", "household_id"],
+    "household": ["household_id"],
+}
+
+
+def write_membership():
+    """Writes the membership index of the generated datasets, if all of
+    them have been generated.
+    """
+    from frs.formats import read_entity
+    from frs.membership import MembershipIndex
+
+    try:
+        frames = [
+            read_entity(resolve("csv"), name, ID_COLUMNS[name])
+            for name in ENTITIES
+        ]
+    except FileNotFoundError:
+        return
+    print("Writing membership index")
+    index = MembershipIndex.build(*frames)
+    shutil.rmtree(resolve("csv/membership"), ignore_errors=True)
+    index.save(resolve("csv/membership"))
+
+
+def write_partition_outputs(column: str, formats: List[str]):
+    """Writes the generated datasets split by a household column, replacing
+    any partitions already written, or removes them if no column is given.
+    Partitions are only written if every entity has been generated.
+    """
+    from frs.formats import dtype_from_json, read_entity
+    from frs.partition import remove_partitions, write_partitions
+
+    folder = resolve("csv")
+    remove_partitions(folder)
+    if column is None:
+        return
+    metadata = read_metadata()
+    try:
+        frames = {
+            name: read_entity(
+                folder,
+                name,
+                order=metadata.get("columns", {}).get(name),
+                dtypes={
+                    field: dtype_from_json(dtype)
+                    for field, dtype in metadata.get("dtypes", {})
+                    .get(name, {})
+                    .items()
+                },
+            )
+            for name in ENTITIES
+        }
+    except FileNotFoundError:
+        return
+    print(f"Writing datasets partitioned by {column}")
+    write_partitions(frames, folder, column, formats)
 
 
 SYNTH_URLS = {
@@ -118,6 +650,8 @@ SYNTH_URLS = {
 
 
 def get_synth():
+    import requests
+
     print("Retrieving example dataset.")
     for filename, url in SYNTH_URLS.items():
         with open(resolve("csv") / filename, "wb") as f:
@@ -127,10 +661,18 @@ def get_synth():
 
 
 def main():
-    ensure_folders_exist()
     args = get_args()
+    # Years are found before the data folder is pointed at one of them.
+    years = stored_years()
+    with year_data(args.year):
+        run_command(args, years)
+
+
+def run_command(args, years: List[int] = None):
+    if args.mode in ("gen", "regen"):
+        ensure_folders_exist()
     if args.mode == "status":
-        run_status()
+        run_status(perf=args.perf, years=years)
     elif args.mode == "gen":
         if args.synth:
             get_synth()
@@ -139,9 +681,20 @@ def main():
             print("Please specify a valid path to FRS TAB files.")
             return
         path = Path(args.path)
-        import_files(path)
+        import_files(path, mode=args.store, workers=args.jobs)
         print("Generating OpenFisca-UK input datasets:")
-        generate_csv(path)
+        generate_csv(
+            path,
+            engine=args.engine,
+            workers=args.jobs,
+            formats=args.format,
+            full=args.full,
+            households=args.households,
+            sample=args.sample,
+            seed=args.seed,
+            validate=args.validate,
+            partition=args.partition,
+        )
         print("Completed generation.")
     elif args.mode == "regen":
         tab_files = os.listdir(resolve("tab"))
@@ -151,25 +704,317 @@ def main():
             )
             return
         print("Re-generating OpenFisca-UK input datasets:")
-        generate_csv()
+        generate_csv(
+            engine=args.engine,
+            workers=args.jobs,
+            formats=args.format,
+            full=args.full,
+            households=args.households,
+            sample=args.sample,
+            seed=args.seed,
+            validate=args.validate,
+            partition=args.partition,
+        )
         print("Completed generation.")
+    elif args.mode == "validate":
+        if not check_datasets(dict(zip(ENTITIES, load()))):
+            raise SystemExit(1)
     elif args.mode == "show":
+        import webbrowser
+
         webbrowser.open("file:///" + resolve("."))
+    elif args.mode == "benchmark":
+        from frs.benchmark import run_benchmark
+
+        results = run_benchmark(
+            args.scale,
+            engine=args.engine,
+            workers=args.jobs,
+            formats=args.format,
+        )
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=4)
+        else:
+            print(json.dumps(results, indent=4))
+
 
+def build(
+    entities: List[str] = ENTITIES,
+    tables: list = None,
+    path: Path = None,
+    engine: str = "column",
+    workers: int = 1,
+    sample: float = None,
+    seed: int = 0,
+    arrays: bool = False,
+    output: Path = None,
+    formats: List[str] = ["csv"],
+    partition: str = None,
+) -> list:
+    """Builds the OpenFisca-UK input datasets from TAB files and returns them
+    directly, without writing and reading back any files. Nothing in the
+    data folder is changed.
 
-def load():
-    ensure_folders_exist()
-    if not os.listdir(resolve("csv")) and not os.listdir(resolve("tab")):
-        warnings.warn(
-            "No OpenFisca-UK input files found, and no FRS source data found either. Downloading the sample dataset instead."
+    Args:
+        entities (List[str], optional): The entities to build, out of
+            "person", "benunit" and "household". Defaults to all three.
+        tables (list, optional): The tables to parse, in order. Only those
+            that feed one of the entities are parsed. Defaults to every
+            table.
+        path (Path, optional): The folder of TAB files. Defaults to the TAB
+            files stored with 'frs gen'.
+        engine (str, optional): "column" or "row", as for 'frs gen
+            --engine'. Defaults to "column".
+        workers (int, optional): The number of processes to parse tables
+            in. Defaults to 1.
+        sample (float, optional): The fraction of households to sample, as
+            for 'frs gen --sample'. Defaults to every household.
+        seed (int, optional): The random seed of the sample. Defaults to 0.
+        arrays (bool, optional): Whether to return a dict of NumPy arrays,
+            one per column, for each entity instead of a DataFrame.
+            Defaults to False.
+        output (Path, optional): A folder to also write the datasets to.
+            Defaults to None, writing nothing.
+        formats (List[str], optional): The formats to write the datasets in
+            when an output folder is given. Defaults to CSV.
+        partition (str, optional): A household column, "country" or
+            "region", to also write the datasets split by when an output
+            folder is given, as for 'frs gen --partition'. Needs every
+            entity. Defaults to None.
+
+    Returns:
+        list: A DataFrame (or dict of arrays) for each entity, in the order
+        given. Entities fed by none of the tables are empty.
+    """
+    import pandas as pd
+    from frs.dataset import Dataset
+    from frs.formats import entity_frame, write_entity
+    from frs.sample import Sample
+    from frs.tables import tables as all_tables
+    from frs.tables.household import HHold
+
+    for name in entities:
+        if name not in ENTITIES:
+            raise ValueError(f"Unknown entity: {name}")
+    if tables is None:
+        tables = all_tables
+    folder = None if path is None else Path(path)
+    if sample is not None:
+        sample = Sample.draw(
+            tab_path(folder or resolve(HHold.folder), HHold.filename),
+            sample,
+            seed,
         )
-        get_synth()
-    elif not os.listdir(resolve("csv")):
-        warnings.warn(
-            "No OpenFisca-UK-compatible data files found, regenerating from FRS TAB sources."
+    dataset = Dataset(
+        [
+            table
+            for table in tables
+            if set(entity_names(table)) & set(entities)
+        ],
+        sample=sample,
+        folder=folder,
+    )
+    dtypes = dataset.dtypes()
+    entity_data, fieldnames = dataset.parse(engine=engine, workers=workers)
+    frames = {
+        entity.__name__.lower(): entity_frame(
+            data, fieldnames[entity], dtypes.get(entity, {})
+        )
+        for entity, data in entity_data.items()
+    }
+    if output is not None:
+        Path(output).mkdir(parents=True, exist_ok=True)
+        for name, frame in frames.items():
+            for format in formats:
+                write_entity(frame, Path(output), name, format)
+        if partition is not None:
+            from frs.partition import write_partitions
+
+            write_partitions(frames, Path(output), partition, formats)
+    result = [frames.get(name, pd.DataFrame()) for name in entities]
+    if arrays:
+        return [
+            {column: frame[column].to_numpy() for column in frame}
+            for frame in result
+        ]
+    return result
+
+
+def load(
+    entities: List[str] = ENTITIES,
+    columns: Dict[str, List[str]] = {},
+    year: int = None,
+    mmap: bool = False,
+    validate: bool = False,
+    filter: dict = None,
+) -> List[pd.DataFrame]:
+    """Loads the generated OpenFisca-UK input datasets.
+
+    Loaded datasets are kept in memory (in LOAD_CACHE, up to its memory
+    budget), so loading the same datasets again does not read any files,
+    until the datasets or their metadata are modified.
+
+    Args:
+        entities (List[str], optional): The entities to load, out of
+            "person", "benunit" and "household". Defaults to all three.
+        columns (Dict[str, List[str]], optional): The columns to read for
+            each entity. Entities not listed have every column read.
+        year (int, optional): The survey year to load, from those stored
+            with 'frs gen --year'. Defaults to the datasets stored without
+            a year.
+        mmap (bool, optional): Whether to memory-map the npy outputs
+            instead of reading them, so that every process loading them
+            shares one copy in memory. The DataFrames' columns are then
+            read-only. Needs npy outputs. Defaults to False.
+        validate (bool, optional): Whether to check the datasets' IDs,
+            weights and values with frs.validation.validate, raising a
+            ValueError listing any problems found. Checks between entities
+            only cover the entities loaded. Defaults to False.
+        filter (dict, optional): The value, or list of values, of household
+            columns to keep the households of, such as
+            {"country": "SCOTLAND"} or {"region": [7, 8]}. Only the people,
+            benefit units and households of the matching households are
+            loaded. If the datasets were generated with 'frs gen
+            --partition' on a filtered column, only the matching partitions
+            are read. Defaults to every household.
+
+    Returns:
+        List[pd.DataFrame]: A DataFrame for each entity, in the order given
+    """
+    for name in entities:
+        if name not in ENTITIES:
+            raise ValueError(f"Unknown entity: {name}")
+    # The year's folder is passed down rather than set as the data folder,
+    # so that loads of different years can run at the same time.
+    folder = year_folder(year)
+    key = (
+        str(folder),
+        tuple(entities),
+        tuple(sorted((name, tuple(names)) for name, names in columns.items())),
+        mmap,
+        tuple(
+            sorted(
+                (column, tuple(filter_values(values)))
+                for column, values in (filter or {}).items()
+            )
+        ),
+    )
+    if year is not None and not folder.exists():
+        raise FileNotFoundError(f"No FRS data stored for {year}.")
+    signature = file_signature(
+        [folder / "metadata.json"]
+        + [
+            output_path(folder / "csv", name, format)
+            for name in entities
+            for format in FORMATS
+        ]
+    )
+    frames = LOAD_CACHE.get(key, signature)
+    if frames is None:
+        frames = read_datasets(entities, columns, mmap, filter, year)
+        LOAD_CACHE.put(
+            key,
+            frames,
+            signature,
+            size=0 if mmap else None,
+            shared=mmap,
+        )
+    if validate:
+        from frs.validation import validate as find_problems
+
+        problems = find_problems(dict(zip(entities, frames)))
+        if problems:
+            raise ValueError(
+                "The datasets failed validation:\n" + "\n".join(problems)
+            )
+    return frames
+
+
+def load_membership(year: int = None, mmap: bool = False):
+    """Loads the membership index written alongside the generated datasets,
+    which gives the benefit units and people of each household, and the
+    people of each benefit unit, as sorted offset arrays.
+
+    Args:
+        year (int, optional): The survey year, as for load(). Defaults to
+            the datasets stored without a year.
+        mmap (bool, optional): Whether to memory-map the index's arrays
+            rather than read them. Defaults to False.
+
+    Returns:
+        MembershipIndex: The index
+    """
+    from frs.membership import MembershipIndex
+
+    path = year_folder(year) / "csv" / "membership"
+    if not path.exists():
+        raise FileNotFoundError(
+            "No membership index found; regenerate the datasets to "
+            "write one."
+        )
+    return MembershipIndex.read(path, mmap)
+
+
+def read_datasets(
+    entities: List[str],
+    columns: Dict[str, List[str]],
+    mmap: bool = False,
+    filter: dict = None,
+    year: int = None,
+) -> List[pd.DataFrame]:
+    from frs.formats import dtype_from_json, read_entity
+
+    folder = year_folder(year)
+    if year is not None:
+        # Only the data folder itself is downloaded to or generated in when
+        # it has no datasets.
+        if not (folder / "csv").exists() or not os.listdir(folder / "csv"):
+            raise FileNotFoundError(
+                f"No OpenFisca-UK input files generated for {year}; use "
+                f"'frs gen --year {year}' to generate them."
+            )
+    else:
+        ensure_folders_exist()
+        if not os.listdir(resolve("csv")) and not os.listdir(resolve("tab")):
+            warnings.warn(
+                "No OpenFisca-UK input files found, and no FRS source data found either. Downloading the sample dataset instead."
+            )
+            get_synth()
+        elif not os.listdir(resolve("csv")):
+            warnings.warn(
+                "No OpenFisca-UK-compatible data files found, regenerating from FRS TAB sources."
+            )
+            generate_csv()
+    metadata = read_metadata(folder)
+    order = metadata.get("columns", {})
+    dtypes = {
+        name: {
+            field: dtype_from_json(dtype) for field, dtype in fields.items()
+        }
+        for name, fields in metadata.get("dtypes", {}).items()
+    }
+    if filter:
+        from frs.partition import read_filtered
+
+        return read_filtered(
+            folder / "csv",
+            entities,
+            columns,
+            filter,
+            metadata.get("partition"),
+            order,
+            dtypes,
+            mmap,
         )
-        generate_csv()
     return [
-        pd.read_csv(resolve(os.path.join("csv", filename)), low_memory=False)
-        for filename in ("person.csv", "benunit.csv", "household.csv")
+        read_entity(
+            folder / "csv",
+            name,
+            columns.get(name),
+            order.get(name),
+            dtypes.get(name, {}),
+            mmap,
+        )
+        for name in entities
     ]
@@ -0,0 +1,329 @@
+import operator
+import numpy as np
+import pandas as pd
+from typing import Dict
+from frs.utils import WEEK, YEAR, adjust_period, is_scalar
+
+# Code maps with integer codes up to this size are looked up in an array
+# rather than a dict.
+MAX_LOOKUP_SIZE = 4096
+
+# The default of code maps without one: codes not in the map raise KeyError.
+REQUIRED = object()
+
+
+class Expression:
+    """An expression of the columns of a TAB file, giving an output field.
+
+    Expressions are built from Column, Field and ID and combined with +, -,
+    *, == and the methods below. Each evaluates to a single value for a row
+    of the TAB file (a SafeDict), or to a column of values for the whole
+    file (a SafeColumns), and knows the TAB file columns it reads.
+    """
+
+    # The TAB file columns the expression reads.
+    columns = frozenset()
+    # The output fields the expression refers to.
+    fields = frozenset()
+
+    def evaluate(self, line, fields: dict):
+        """Evaluates the expression.
+
+        Args:
+            line (SafeDict or SafeColumns): A row of the TAB file, or its
+                columns
+            fields (dict): The output fields already evaluated
+
+        Returns:
+            The value, or a Series or array of values aligned with line
+        """
+        raise NotImplementedError()
+
+    def __add__(self, other) -> "Expression":
+        return Binary(operator.add, self, other)
+
+    def __radd__(self, other) -> "Expression":
+        return Binary(operator.add, other, self)
+
+    def __sub__(self, other) -> "Expression":
+        return Binary(operator.sub, self, other)
+
+    def __rsub__(self, other) -> "Expression":
+        return Binary(operator.sub, other, self)
+
+    def __mul__(self, other) -> "Expression":
+        return Binary(operator.mul, self, other)
+
+    def __rmul__(self, other) -> "Expression":
+        return Binary(operator.mul, other, self)
+
+    def __eq__(self, other) -> "Expression":
+        return Binary(operator.eq, self, other)
+
+    def __ne__(self, other) -> "Expression":
+        return Binary(operator.ne, self, other)
+
+    __hash__ = object.__hash__
+
+    def map(self, codes: dict, default=REQUIRED) -> "Expression":
+        """Looks each value up in a table of codes, such as COUNTRY.
+
+        Args:
+            codes (dict): The value of each code
+            default (optional): The value of codes not in the table.
+                Defaults to raising KeyError for them.
+        """
+        if isinstance(self, Map) and self.default is REQUIRED:
+            # Two lookups in a row are folded into one. Codes whose value is
+            # not in the second table keep the second table's default, or
+            # are left out to raise KeyError.
+            folded = {
+                code: codes.get(value, default)
+                for code, value in self.codes.items()
+                if value in codes or default is not REQUIRED
+            }
+            return Map(self.value, folded, default)
+        return Map(self, codes, default)
+
+    def isin(self, values: list) -> "Expression":
+        return IsIn(self, values)
+
+    def otherwise(self, other) -> "Expression":
+        """Falls back to another expression where the value is zero (or
+        missing in the TAB file), as with `a or b`.
+        """
+        return Otherwise(self, other)
+
+    def adjust_period(self, period_code=WEEK, target=YEAR) -> "Expression":
+        """Converts the value from one period to another, as with
+        frs.utils.adjust_period. The period may be a code or an expression
+        giving each row's code, such as Column("PERIOD").
+        """
+        return Adjust(self, expression(period_code), target)
+
+    def yearly(self) -> "Expression":
+        """Converts a weekly value to a yearly one."""
+        return self.adjust_period(WEEK, YEAR)
+
+
+class Constant(Expression):
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, line, fields: dict):
+        return self.value
+
+
+class Column(Expression):
+    """A column of the TAB file, read as a number, with missing and
+    non-numeric values read as zero."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.columns = frozenset([name])
+
+    def evaluate(self, line, fields: dict):
+        return line[self.name]
+
+
+class Field(Expression):
+    """An output field set earlier in the same mapping."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.fields = frozenset([name])
+
+    def evaluate(self, line, fields: dict):
+        return fields[self.name]
+
+
+class ID(Expression):
+    """The ID of an entity, such as ID(Person)."""
+
+    def __init__(self, entity: type):
+        self.entity = entity
+        self.columns = frozenset(entity.id_columns)
+
+    def evaluate(self, line, fields: dict):
+        if isinstance(line, dict):
+            return self.entity.id(line)
+        return self.entity.ids(line)
+
+
+class Binary(Expression):
+    def __init__(self, function, left, right):
+        self.function = function
+        self.left = expression(left)
+        self.right = expression(right)
+        self.columns = self.left.columns | self.right.columns
+        self.fields = self.left.fields | self.right.fields
+
+    def evaluate(self, line, fields: dict):
+        return self.function(
+            self.left.evaluate(line, fields), self.right.evaluate(line, fields)
+        )
+
+
+class Map(Expression):
+    def __init__(self, value: Expression, codes: dict, default=REQUIRED):
+        self.value = value
+        self.codes = dict(codes)
+        self.default = default
+        self.columns = value.columns
+        self.fields = value.fields
+        self.lookup = None
+        keys = list(self.codes)
+        if all(
+            isinstance(key, int) and 0 <= key < MAX_LOOKUP_SIZE for key in keys
+        ):
+            size = max(keys, default=-1) + 1
+            values = list(self.codes.values())
+            dtype = np.asarray(values).dtype
+            if dtype.kind not in "biuf":
+                dtype = object
+            self.lookup = np.empty(size, dtype=dtype)
+            self.lookup[keys] = values
+            self.known = np.zeros(size, dtype=bool)
+            self.known[keys] = True
+
+    def evaluate(self, line, fields: dict):
+        value = self.value.evaluate(line, fields)
+        if is_scalar(value):
+            if value in self.codes:
+                return self.codes[value]
+            return self.missing(np.asarray([value]))
+        if self.lookup is None:
+            values = pd.Series(value)
+            known = values.isin(list(self.codes)).to_numpy()
+            result = values.map(self.codes)
+            if not known.all():
+                result = result.where(known, self.missing(values[~known]))
+            return result
+        array = np.asarray(value, dtype=np.float64)
+        valid = (
+            (array >= 0)
+            & (array < len(self.lookup))
+            & (array == np.floor(array))
+        )
+        positions = np.where(valid, array, 0).astype(np.intp)
+        known = valid & self.known[positions]
+        result = self.lookup[positions]
+        if not known.all():
+            result = np.where(known, result, self.missing(array[~known]))
+        return aligned(result, value)
+
+    def missing(self, values):
+        """Returns the default for codes not in the table, or raises KeyError
+        naming the first of them if there is no default.
+        """
+        if self.default is not REQUIRED:
+            return self.default
+        code = np.asarray(values).ravel()[0].item()
+        if isinstance(code, float) and code.is_integer():
+            code = int(code)
+        source = ", ".join(sorted(self.columns)) or "the value"
+        raise KeyError(f"{code!r} is not a known code of {source}.")
+
+
+class IsIn(Expression):
+    def __init__(self, value: Expression, values: list):
+        self.value = value
+        self.values = list(values)
+        self.columns = value.columns
+        self.fields = value.fields
+
+    def evaluate(self, line, fields: dict):
+        value = self.value.evaluate(line, fields)
+        if is_scalar(value):
+            return value in self.values
+        return aligned(np.isin(np.asarray(value), self.values), value)
+
+
+class Otherwise(Expression):
+    def __init__(self, value: Expression, other):
+        self.value = value
+        self.other = expression(other)
+        self.columns = value.columns | self.other.columns
+        self.fields = value.fields | self.other.fields
+
+    def evaluate(self, line, fields: dict):
+        value = self.value.evaluate(line, fields)
+        if is_scalar(value):
+            return value or self.other.evaluate(line, fields)
+        other = self.other.evaluate(line, fields)
+        return aligned(np.where(np.asarray(value) != 0, value, other), value)
+
+
+class Adjust(Expression):
+    def __init__(self, value: Expression, period: Expression, target: int):
+        self.value = value
+        self.period = period
+        self.target = target
+        self.columns = value.columns | period.columns
+        self.fields = value.fields | period.fields
+
+    def evaluate(self, line, fields: dict):
+        return adjust_period(
+            self.value.evaluate(line, fields),
+            self.period.evaluate(line, fields),
+            self.target,
+        )
+
+
+def aligned(result: np.ndarray, value):
+    """Returns an array of results as a Series if the values they came from
+    were one.
+    """
+    if hasattr(value, "index"):
+        return pd.Series(result, index=value.index)
+    return result
+
+
+def expression(value) -> Expression:
+    if isinstance(value, Expression):
+        return value
+    return Constant(value)
+
+
+class Plan:
+    """A mapping from output fields to expressions, compiled once into a
+    list of steps that evaluate every field of a row, or of a whole TAB file
+    at once.
+    """
+
+    def __init__(self, mapping: Dict[str, Expression]):
+        """
+        Args:
+            mapping (Dict[str, Expression]): The expression of each output
+                field, in the order the fields are set. Values that are not
+                expressions are constants.
+        """
+        self.steps = []
+        for field, value in mapping.items():
+            value = expression(value)
+            earlier = {name for name, _ in self.steps}
+            if not value.fields <= earlier:
+                missing = ", ".join(sorted(value.fields - earlier))
+                raise ValueError(
+                    f"{field} refers to fields not set before it: {missing}."
+                )
+            self.steps += [(field, value)]
+        self.fieldnames = [field for field, _ in self.steps]
+        self.columns = frozenset().union(
+            *(value.columns for _, value in self.steps)
+        )
+
+    def evaluate(self, line) -> dict:
+        """Evaluates every field.
+
+        Args:
+            line (SafeDict or SafeColumns): A row of the TAB file, or its
+                columns
+
+        Returns:
+            dict: The value, or column of values, of each field
+        """
+        fields = {}
+        for field, value in self.steps:
+            fields[field] = value.evaluate(line, fields)
+        return fields
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# The arrays of a membership index, each saved as a .npy file.
+ARRAYS = [
+    "household_id",
+    "household_rows",
+    "benunit_id",
+    "benunit_rows",
+    "person_id",
+    "person_rows",
+    "household_benunit_offsets",
+    "household_person_offsets",
+    "benunit_person_offsets",
+    "person_household",
+    "person_benunit",
+    "benunit_household",
+]
+
+
+def positions(ids: np.ndarray, values: np.ndarray, name: str) -> np.ndarray:
+    """Returns the position of each value in a sorted array of IDs."""
+    found = np.searchsorted(ids, values)
+    if len(values) and (
+        (found >= len(ids)).any()
+        or (ids[np.minimum(found, len(ids) - 1)] != values).any()
+    ):
+        raise ValueError(f"Some {name} IDs have no {name} row.")
+    return found
+
+
+def offsets(groups: np.ndarray, size: int) -> np.ndarray:
+    """Returns CSR offsets for members sorted by group: the members of group
+    i are those from offsets[i] up to offsets[i + 1].
+    """
+    return np.concatenate(
+        [[0], np.cumsum(np.bincount(groups, minlength=size))]
+    ).astype(np.int64)
+
+
+class MembershipIndex:
+    """The members of each household and benefit unit, as sorted, CSR-style
+    offset arrays.
+
+    Households are ordered by household_id, benefit units by household then
+    benunit_id, and people by household, benefit unit then person_id. In
+    that order:
+
+    - household_rows, benunit_rows and person_rows give the row of each
+      household, benefit unit and person in its entity's DataFrame.
+    - The benefit units of household i are household_benunit_offsets[i] up
+      to household_benunit_offsets[i + 1], and likewise for
+      household_person_offsets and benunit_person_offsets.
+
+    person_household, person_benunit and benunit_household give, for each
+    row of the person and benefit unit DataFrames, the position of its
+    household or benefit unit in the order above.
+    """
+
+    def __init__(self, arrays: dict):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @staticmethod
+    def build(
+        person: pd.DataFrame, benunit: pd.DataFrame, household: pd.DataFrame
+    ) -> "MembershipIndex":
+        """Builds the index from the ID columns of each entity.
+
+        Args:
+            person (pd.DataFrame): The person_id, benunit_id and
+                household_id of each person
+            benunit (pd.DataFrame): The benunit_id and household_id of each
+                benefit unit
+            household (pd.DataFrame): The household_id of each household
+
+        Returns:
+            MembershipIndex: The index
+        """
+        arrays = {}
+        household_ids = household["household_id"].to_numpy(np.int64)
+        arrays["household_rows"] = np.argsort(household_ids, kind="stable")
+        arrays["household_id"] = household_ids[arrays["household_rows"]]
+        num_households = len(household_ids)
+
+        benunit_ids = benunit["benunit_id"].to_numpy(np.int64)
+        benunit_household = positions(
+            arrays["household_id"],
+            benunit["household_id"].to_numpy(np.int64),
+            "household",
+        )
+        arrays["benunit_rows"] = np.lexsort((benunit_ids, benunit_household))
+        arrays["benunit_id"] = benunit_ids[arrays["benunit_rows"]]
+        arrays["household_benunit_offsets"] = offsets(
+            benunit_household, num_households
+        )
+        arrays["benunit_household"] = benunit_household
+
+        person_ids = person["person_id"].to_numpy(np.int64)
+        person_household = positions(
+            arrays["household_id"],
+            person["household_id"].to_numpy(np.int64),
+            "household",
+        )
+        order = np.argsort(arrays["benunit_id"], kind="stable")
+        person_benunit = order[
+            positions(
+                arrays["benunit_id"][order],
+                person["benunit_id"].to_numpy(np.int64),
+                "benefit unit",
+            )
+        ]
+        arrays["person_rows"] = np.lexsort(
+            (person_ids, person_benunit, person_household)
+        )
+        arrays["person_id"] = person_ids[arrays["person_rows"]]
+        arrays["household_person_offsets"] = offsets(
+            person_household, num_households
+        )
+        arrays["benunit_person_offsets"] = offsets(
+            person_benunit, len(benunit_ids)
+        )
+        arrays["person_household"] = person_household
+        arrays["person_benunit"] = person_benunit
+        return MembershipIndex(arrays)
+
+    def save(self, folder: Path):
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(folder / f"{name}.npy", getattr(self, name))
+
+    @staticmethod
+    def read(folder: Path, mmap: bool = False) -> "MembershipIndex":
+        return MembershipIndex(
+            {
+                name: np.load(
+                    Path(folder) / f"{name}.npy",
+                    mmap_mode="r" if mmap else None,
+                    allow_pickle=False,
+                )
+                for name in ARRAYS
+            }
+        )
+
+    def sum(
+        self, values, entity: str = "person", by: str = "household"
+    ) -> np.ndarray:
+        """Adds up the values of the members of each household or benefit
+        unit.
+
+        Args:
+            values (array-like): A value per row of the entity's DataFrame
+            entity (str, optional): "person" or "benunit". Defaults to
+                "person".
+            by (str, optional): "household" or "benunit". Defaults to
+                "household".
+
+        Returns:
+            np.ndarray: The total of each household or benefit unit, in
+            the order of household_id or benunit_id
+        """
+        if (entity, by) == ("person", "household"):
+            rows, bounds = self.person_rows, self.household_person_offsets
+        elif (entity, by) == ("person", "benunit"):
+            rows, bounds = self.person_rows, self.benunit_person_offsets
+        elif (entity, by) == ("benunit", "household"):
+            rows, bounds = self.benunit_rows, self.household_benunit_offsets
+        else:
+            raise ValueError(f"Cannot add up {entity} values by {by}.")
+        return reduce_segments(np.asarray(values)[rows], bounds)
+
+
+def reduce_segments(values: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Adds up consecutive segments of an array, given CSR offsets, with
+    empty segments adding up to zero.
+    """
+    starts = bounds[:-1]
+    totals = np.zeros((len(starts),) + values.shape[1:], dtype=values.dtype)
+    # reduceat runs each segment up to the next start, so only the starts of
+    # non-empty segments are given: the empty ones between them are empty.
+    filled = starts < bounds[1:]
+    if filled.any():
+        totals[filled] = np.add.reduceat(values, starts[filled])
+    return totals
@@ -0,0 +1,168 @@
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List
+from frs.formats import read_entity, write_entity
+from frs.utils import (
+    ENTITIES,
+    PARTITION_COLUMNS,
+    filter_values,
+    partition_name,
+)
+
+
+def partition_folder(folder: Path, column: str, value) -> Path:
+    return Path(folder) / "partitions" / f"{column}={partition_name(value)}"
+
+
+def remove_partitions(folder: Path):
+    shutil.rmtree(Path(folder) / "partitions", ignore_errors=True)
+
+
+def household_keys(household: pd.DataFrame, column: str) -> pd.Series:
+    """Returns the value of a household column for each household ID."""
+    keys = pd.Series(
+        household[column].to_numpy(),
+        index=household["household_id"].to_numpy(),
+    )
+    return keys[~keys.index.duplicated()]
+
+
+def write_partitions(
+    frames: Dict[str, pd.DataFrame],
+    folder: Path,
+    column: str,
+    formats: List[str],
+) -> List[str]:
+    """Writes the datasets again split by a household column, such as
+    country, into a folder per value: partitions/country=SCOTLAND holds the
+    people, benefit units and households of Scottish households. People and
+    benefit units go with their household.
+
+    Args:
+        frames (Dict[str, pd.DataFrame]): The dataset of each entity
+        folder (Path): The output folder
+        column (str): The household column, one of PARTITION_COLUMNS
+        formats (List[str]): The formats to write each partition in
+
+    Returns:
+        List[str]: The values partitioned by
+    """
+    if column not in PARTITION_COLUMNS:
+        raise ValueError(f"Cannot partition by {column}.")
+    remove_partitions(folder)
+    keys = household_keys(frames["household"], column)
+    values = sorted(keys.dropna().unique())
+    for name in ENTITIES:
+        frame = frames[name]
+        frame_keys = keys.reindex(frame["household_id"].to_numpy()).to_numpy()
+        for value in values:
+            path = partition_folder(folder, column, value)
+            path.mkdir(parents=True, exist_ok=True)
+            part = frame[frame_keys == value].reset_index(drop=True)
+            for format in formats:
+                write_entity(part, path, name, format)
+    return values
+
+
+def read_filtered(
+    folder: Path,
+    entities: List[str],
+    columns: Dict[str, List[str]],
+    filter: dict,
+    partition: str = None,
+    order: dict = {},
+    dtypes: dict = {},
+    mmap: bool = False,
+) -> List[pd.DataFrame]:
+    """Reads the rows of the datasets that belong to the households matching
+    a filter. A filter on the column the datasets were partitioned by only
+    reads the matching partitions. Other filters read the households'
+    columns to find the matching households, and then keep the rows of
+    those households.
+
+    Args:
+        folder (Path): The output folder
+        entities (List[str]): The entities to read
+        columns (Dict[str, List[str]]): The columns to read for each entity
+        filter (dict): The value, or list of values, each household column
+            must have, such as {"country": "SCOTLAND"}
+        partition (str, optional): The column the datasets were
+            partitioned by. Defaults to None, for no partitions.
+        order (dict, optional): The column order of each entity.
+        dtypes (dict, optional): The declared dtypes of each entity.
+        mmap (bool, optional): Whether to memory-map npy outputs.
+
+    Returns:
+        List[pd.DataFrame]: A DataFrame for each entity
+    """
+    for column in filter:
+        if column not in order.get("household", [column]):
+            raise KeyError(f"{column} is not a household column.")
+    household_dtypes = dtypes.get("household", {})
+    filter = {
+        column: filter_values(values, household_dtypes.get(column))
+        for column, values in filter.items()
+    }
+    if partition not in filter:
+        partition = None
+
+    def read(name: str, names: List[str]) -> pd.DataFrame:
+        if partition is None:
+            return read_entity(
+                folder,
+                name,
+                names,
+                order.get(name),
+                dtypes.get(name, {}),
+                mmap,
+            )
+        frames = [
+            read_entity(
+                partition_folder(folder, partition, value),
+                name,
+                names,
+                order.get(name),
+                dtypes.get(name, {}),
+                mmap,
+            )
+            for value in filter[partition]
+            if partition_folder(folder, partition, value).exists()
+        ]
+        if not frames:
+            # No households match, so read any partition for its columns.
+            first = next((Path(folder) / "partitions").iterdir())
+            return read_entity(
+                first, name, names, order.get(name), dtypes.get(name, {}), mmap
+            ).iloc[:0]
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    others = {
+        column: values
+        for column, values in filter.items()
+        if column != partition
+    }
+    households = None
+    if others:
+        household = read("household", ["household_id"] + list(others))
+        matches = np.ones(len(household), dtype=bool)
+        for column, values in others.items():
+            values = filter_values(values, household[column].dtype)
+            matches &= household[column].isin(values).to_numpy()
+        households = household["household_id"].to_numpy()[matches]
+    frames = []
+    for name in entities:
+        names = columns.get(name)
+        if households is None:
+            frames += [read(name, names)]
+            continue
+        extra = names is not None and "household_id" not in names
+        frame = read(name, list(names) + ["household_id"] if extra else names)
+        frame = frame[frame["household_id"].isin(households).to_numpy()]
+        if extra:
+            frame = frame[names]
+        frames += [frame.reset_index(drop=True)]
+    return frames
@@ -0,0 +1,45 @@
+import os
+from pathlib import Path
+from typing import Callable
+
+# Functions called with each table's and entity's statistics as they are
+# recorded, e.g. to forward them to a metrics system.
+HOOKS = []
+
+
+def add_hook(hook: Callable):
+    """Registers a function to receive profiling statistics. It is called as
+    hook(kind, name, stats), where kind is "table", "entity" or "output",
+    name is the table class name, entity name or output file name (such as
+    "person.csv"), and stats is the dict of statistics that is also stored
+    in metadata.json.
+
+    Hooks are called in the process that called Dataset.parse or
+    generate_csv, even when tables are parsed in other processes.
+    """
+    HOOKS.append(hook)
+
+
+def remove_hook(hook: Callable):
+    HOOKS.remove(hook)
+
+
+def report(kind: str, name: str, stats: dict):
+    for hook in HOOKS:
+        hook(kind, name, stats)
+
+
+def rate(count: float, seconds: float) -> float:
+    if not seconds:
+        return None
+    return count / seconds
+
+
+def size_of(path: Path) -> int:
+    """Returns the size of a file, or of every file in a folder."""
+    path = Path(path)
+    if path.is_dir():
+        return sum(size_of(child) for child in path.iterdir())
+    if path.exists():
+        return os.path.getsize(path)
+    return 0
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from frs.storage import open_text
+
+
+class Sample:
+    """A subsample of households, with the factor each household's GROSS4
+    weight is scaled by so that the sample represents the whole survey.
+    """
+
+    def __init__(self, sernums: np.ndarray, factors: np.ndarray):
+        self.sernums = np.asarray(sernums, dtype=np.float64)
+        self.factors = dict(
+            zip(self.sernums.tolist(), np.asarray(factors).tolist())
+        )
+
+    @staticmethod
+    def draw(path: Path, fraction: float, seed: int = 0) -> "Sample":
+        """Draws a sample of households from a household TAB file,
+        stratified by region (GVTREGNO). Each region keeps the given
+        fraction of its households (at least one), and the weights of the
+        households kept are scaled up by the region's households per
+        household kept.
+
+        Args:
+            path (Path): The household TAB file, which may be compressed
+            fraction (float): The share of households to keep
+            seed (int, optional): The random seed. Defaults to 0.
+
+        Returns:
+            Sample: The sample
+        """
+        if not 0 < fraction <= 1:
+            raise ValueError("The sample fraction must be in (0, 1].")
+        with open_text(path) as f:
+            names = next(f).split("\t")
+        households = pd.read_csv(
+            path,
+            sep="\t",
+            names=names,
+            header=None,
+            skiprows=1,
+            usecols=[
+                i
+                for i, name in enumerate(names)
+                if name in ("sernum", "GVTREGNO")
+            ],
+        ).apply(pd.to_numeric, errors="coerce")
+        if "GVTREGNO" not in households:
+            households["GVTREGNO"] = 0
+        rng = np.random.default_rng(seed)
+        sernums, factors = [], []
+        for _, stratum in households.groupby(
+            households["GVTREGNO"].fillna(-1), sort=True
+        ):
+            size = max(1, round(fraction * len(stratum)))
+            chosen = np.sort(rng.choice(len(stratum), size, replace=False))
+            sernums += [stratum["sernum"].to_numpy()[chosen]]
+            factors += [np.full(size, len(stratum) / size)]
+        return Sample(np.concatenate(sernums), np.concatenate(factors))
+
+    def select(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Keeps the rows of a TAB file's columns that belong to sampled
+        households, scaling their GROSS4 weights.
+        """
+        sernum = pd.to_numeric(frame["sernum"], errors="coerce")
+        selected = sernum.isin(self.sernums).to_numpy()
+        frame = frame[selected].reset_index(drop=True)
+        if "GROSS4" in frame:
+            frame["GROSS4"] = (
+                pd.to_numeric(frame["GROSS4"], errors="coerce")
+                * sernum[selected].map(self.factors).to_numpy()
+            )
+        return frame
+
+    def select_line(self, line: dict) -> dict:
+        """Row-by-row counterpart of select: returns the line with its
+        weight scaled, or None if its household is not sampled.
+        """
+        try:
+            factor = self.factors.get(float(line["sernum"]))
+        except (KeyError, ValueError):
+            return None
+        if factor is None:
+            return None
+        if "GROSS4" in line:
+            try:
+                line["GROSS4"] = repr(float(line["GROSS4"]) * factor)
+            except (TypeError, ValueError):
+                pass
+        return line
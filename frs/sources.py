@@ -0,0 +1,177 @@
+import hashlib
+import inspect
+import os
+from pathlib import Path
+from typing import Dict, List
+from frs.storage import tab_path
+from frs.utils import resolve
+
+PACKAGE = Path(__file__).parent
+
+# The package modules every entity is built with, besides its tables: the
+# parsing engines, the helpers tables use, TAB file reading, output
+# formatting and the list of tables.
+SHARED_MODULES = [
+    "dataset.py",
+    "mapping.py",
+    "utils.py",
+    "storage.py",
+    "formats.py",
+    "tables/__init__.py",
+]
+
+
+def hash_file(path: Path, previous: dict = None) -> dict:
+    """Hashes the contents of a file.
+
+    Args:
+        path (Path): The file
+        previous (dict, optional): A previous result for the same file. If
+            its size and modification time still match, its hash is reused
+            rather than reading the file again.
+
+    Returns:
+        dict: The hash, size and modification time of the file
+    """
+    stat = os.stat(path)
+    result = dict(size=stat.st_size, mtime=stat.st_mtime_ns)
+    if previous and all(
+        previous.get(key) == value for key, value in result.items()
+    ):
+        result["hash"] = previous["hash"]
+        return result
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    result["hash"] = digest.hexdigest()
+    return result
+
+
+def entity_names(table) -> List[str]:
+    entities = table.entity
+    if not isinstance(entities, list):
+        entities = [entities]
+    return [entity.__name__.lower() for entity in entities]
+
+
+def module_path(table) -> str:
+    """Returns the source file of a table, relative to the package when it
+    is one of the package's own tables.
+    """
+    path = Path(inspect.getfile(table)).resolve()
+    try:
+        return str(path.relative_to(PACKAGE.resolve()))
+    except ValueError:
+        return str(path)
+
+
+def describe_sources(tables: list, previous: dict = {}) -> dict:
+    """Records the TAB files and table code that each entity is built from.
+
+    Args:
+        tables (list): The tables, in parsing order
+        previous (dict, optional): The metadata of the last generation, used
+            to avoid re-hashing unchanged files.
+
+    Returns:
+        dict: The hash and entities of each table and TAB file, the hash of
+        each shared module, and the tables of each entity in order
+    """
+    sources = dict(tables={}, files={}, modules={}, entities={})
+    for module in SHARED_MODULES:
+        sources["modules"][module] = hash_file(
+            PACKAGE / module, previous.get("modules", {}).get(module)
+        )
+    for table in tables:
+        names = entity_names(table)
+        module = module_path(table)
+        sources["tables"][table.__name__] = dict(
+            module=module,
+            filename=table.filename,
+            entities=names,
+            **hash_file(
+                PACKAGE / module,
+                previous.get("tables", {}).get(table.__name__),
+            ),
+        )
+        path = tab_path(resolve(table.folder), table.filename)
+        if path.exists():
+            sources["files"][table.filename] = dict(
+                entities=names,
+                **hash_file(
+                    path, previous.get("files", {}).get(table.filename)
+                ),
+            )
+        for name in names:
+            sources["entities"].setdefault(name, [])
+            sources["entities"][name] += [table.__name__]
+    return sources
+
+
+def recorded_sources(metadata: dict) -> dict:
+    """Re-describes the sources recorded in a generation's metadata, without
+    importing any of the tables.
+    """
+    sources = dict(
+        tables={}, files={}, modules={}, entities=metadata.get("entities", {})
+    )
+    for module in SHARED_MODULES:
+        sources["modules"][module] = hash_file(
+            PACKAGE / module, metadata.get("modules", {}).get(module)
+        )
+    for name, table in metadata.get("tables", {}).items():
+        path = PACKAGE / table["module"]
+        if path.exists():
+            sources["tables"][name] = dict(table, **hash_file(path, table))
+    for filename, file in metadata.get("files", {}).items():
+        path = tab_path(resolve("tab"), filename)
+        if path.exists():
+            sources["files"][filename] = dict(file, **hash_file(path, file))
+    return sources
+
+
+def stale_entities(metadata: dict, sources: dict) -> Dict[str, List[str]]:
+    """Compares the sources of the last generation with the current ones.
+
+    Args:
+        metadata (dict): The metadata of the last generation
+        sources (dict): The current sources, from describe_sources
+
+    Returns:
+        Dict[str, List[str]]: The reasons each stale entity needs rebuilding
+    """
+    stale = {}
+    # Every entity is built with the shared modules.
+    shared = [
+        f"{module} code changed"
+        for module, source in sources.get("modules", {}).items()
+        if metadata.get("modules", {}).get(module, {}).get("hash")
+        != source["hash"]
+    ]
+    for name, table_names in sources["entities"].items():
+        if name not in metadata.get("entities", {}):
+            stale[name] = ["no record of its sources"]
+            continue
+        reasons = list(shared)
+        if metadata["entities"][name] != table_names:
+            reasons += ["tables changed"]
+        for table_name in table_names:
+            table = sources["tables"].get(table_name)
+            old_table = metadata.get("tables", {}).get(table_name)
+            if table is None:
+                reasons += [f"{table_name} code missing"]
+                continue
+            if old_table is None:
+                continue
+            if table["hash"] != old_table["hash"]:
+                reasons += [f"{table_name} code changed"]
+            file = sources["files"].get(table["filename"])
+            old_file = metadata.get("files", {}).get(table["filename"])
+            if file is None:
+                reasons += [f"{table['filename']} missing"]
+            elif old_file is None or file["hash"] != old_file["hash"]:
+                reasons += [f"{table['filename']} changed"]
+        if reasons:
+            stale[name] = reasons
+    return stale
@@ -0,0 +1,151 @@
+import gzip
+import io
+import lzma
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+# The suffix of TAB files stored with each compression.
+COMPRESSIONS = {"gzip": ".gz", "lzma": ".xz", "zstd": ".zst"}
+
+# The ways TAB files can be stored: copied, linked to in place, or
+# compressed.
+STORE_MODES = ["copy", "hardlink", "symlink"] + list(COMPRESSIONS)
+
+
+def tab_path(folder: Path, filename: str) -> Path:
+    """Returns the path a TAB file is stored at, which has a compression
+    suffix if it was stored compressed.
+
+    Args:
+        folder (Path): The folder of stored TAB files
+        filename (str): The name of the TAB file, such as "househol.tab"
+
+    Returns:
+        Path: The stored file, or the uncompressed path if it is not stored
+    """
+    path = Path(folder) / filename
+    for suffix in COMPRESSIONS.values():
+        compressed = path.with_name(path.name + suffix)
+        if compressed.exists():
+            return compressed
+    return path
+
+
+def compression_of(path: Path) -> str:
+    for compression, suffix in COMPRESSIONS.items():
+        if Path(path).name.endswith(suffix):
+            return compression
+    return None
+
+
+def open_binary(path: Path, mode: str = "rb"):
+    """Opens a stored TAB file as bytes, decompressing (or compressing, for
+    writing) as it is read, rather than all at once.
+    """
+    compression = compression_of(path)
+    if compression == "gzip":
+        # A fixed modification time keeps the compressed file the same for
+        # the same contents.
+        return gzip.GzipFile(path, mode, mtime=0)
+    if compression == "lzma":
+        return lzma.open(path, mode)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+def open_text(path: Path):
+    """Opens a stored TAB file for reading as text, decompressing it as it is
+    read.
+    """
+    return io.TextIOWrapper(open_binary(path), encoding="utf-8")
+
+
+def store_file(source: Path, folder: Path, mode: str = "copy") -> Path:
+    """Stores a TAB file in the folder of stored TAB files, replacing any
+    version of it already stored.
+
+    Args:
+        source (Path): The TAB file
+        folder (Path): The folder of stored TAB files
+        mode (str, optional): "copy" to copy the file, "hardlink" or
+            "symlink" to link to it in place, without using any more disk
+            space, or "gzip", "lzma" or "zstd" to store it compressed.
+            Defaults to "copy".
+
+    Returns:
+        Path: The stored file
+    """
+    if mode not in STORE_MODES:
+        raise ValueError(f"Unknown storage mode {mode}.")
+    source = Path(source)
+    variants = [Path(folder) / source.name] + [
+        Path(folder) / (source.name + suffix)
+        for suffix in COMPRESSIONS.values()
+    ]
+    target = variants[0]
+    if mode in COMPRESSIONS:
+        target = target.with_name(target.name + COMPRESSIONS[mode])
+    if source.absolute() != target.absolute():
+        store_as(source, target, mode)
+    for variant in variants:
+        if variant != target and (variant.exists() or variant.is_symlink()):
+            variant.unlink()
+    return target
+
+
+def store_as(source: Path, target: Path, mode: str):
+    # Write beside the target and move into place, so that a link to the
+    # source is replaced rather than written through.
+    temporary = target.with_name(".tmp-" + target.name)
+    if temporary.exists() or temporary.is_symlink():
+        temporary.unlink()
+    if mode == "copy":
+        shutil.copyfile(source, temporary)
+    elif mode == "hardlink":
+        try:
+            os.link(source, temporary)
+        except OSError:
+            # Hard links cannot cross file systems, so copy instead.
+            shutil.copyfile(source, temporary)
+    elif mode == "symlink":
+        os.symlink(source.resolve(), temporary)
+    else:
+        with open(source, "rb") as f, open_binary(temporary, "wb") as out:
+            shutil.copyfileobj(f, out, 1 << 20)
+    os.replace(temporary, target)
+
+
+def store_files(
+    sources: List[Path], folder: Path, mode: str = "copy", workers: int = 1
+) -> List[Path]:
+    """Stores TAB files in parallel threads, with a progress bar.
+
+    Args:
+        sources (List[Path]): The TAB files
+        folder (Path): The folder of stored TAB files
+        mode (str, optional): How to store them, as for store_file.
+            Defaults to "copy".
+        workers (int, optional): The number of files to store at once.
+            Defaults to 1.
+
+    Returns:
+        List[Path]: The stored files
+    """
+    from tqdm import tqdm
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            tqdm(
+                executor.map(
+                    lambda source: store_file(source, folder, mode), sources
+                ),
+                total=len(sources),
+                desc="Storing FRS files",
+            )
+        )
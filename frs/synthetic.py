@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# The number of households in a year of the FRS, used as the unit of scale.
+HOUSEHOLDS_PER_YEAR = 19169
+
+BENEFIT_CODES = [1, 2, 3, 4, 5, 13, 14, 16, 19, 62, 90, 91, 94, 95, 96, 97]
+
+REGION_CODES = [1, 2, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13]
+
+# The most people in a household, as person IDs have one digit for the
+# person's number within their household.
+MAX_PEOPLE = 9
+
+
+def blank(values: np.ndarray, rng, share: float = 0.5) -> np.ndarray:
+    """Blanks out a share of values, as unanswered FRS questions are."""
+    values = values.astype(float)
+    values[rng.random(len(values)) < share] = np.nan
+    return values
+
+
+def members(rng, parents: np.ndarray, low: int, high: int) -> np.ndarray:
+    """Returns the index of the parent of each member, where each parent has
+    between low and high members (inclusive).
+    """
+    counts = rng.integers(low, high + 1, len(parents))
+    return np.repeat(np.arange(len(parents)), counts)
+
+
+def generate_tab(folder: Path, scale: float = 1, seed: int = 0) -> dict:
+    """Writes synthetic TAB files with the columns the tables read, so that
+    parsing can be exercised without FRS microdata. The values are random and
+    have no statistical meaning.
+
+    Args:
+        folder (Path): The folder to write the TAB files to
+        scale (float, optional): The number of households, as a multiple of
+            a year of the FRS. Defaults to 1.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        dict: The number of rows written to each TAB file
+    """
+    rng = np.random.default_rng(seed)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    num_households = max(1, round(scale * HOUSEHOLDS_PER_YEAR))
+    sernum = np.arange(1, num_households + 1)
+    weight = rng.integers(500, 3000, num_households)
+    files = {}
+
+    household = pd.DataFrame(
+        dict(
+            sernum=sernum,
+            GROSS4=weight,
+            COUNTRY=rng.integers(1, 5, num_households),
+            ROOMS10=rng.integers(1, 9, num_households),
+            HHRENT=blank(rng.integers(0, 300, num_households), rng),
+            HHSTAT=rng.integers(1, 3, num_households),
+            GBHSCOST=rng.integers(0, 200, num_households),
+            NIHSCOST=blank(np.zeros(num_households), rng),
+            CTBAND=rng.integers(1, 11, num_households),
+            CTANNUAL=blank(rng.integers(800, 3000, num_households), rng),
+            PTENTYP2=rng.integers(1, 7, num_households),
+            GVTREGNO=rng.choice(REGION_CODES, num_households),
+        )
+    )
+    files["househol.tab"] = household
+
+    # Benefit units, each with one or two adults and up to two children,
+    # dropping children beyond MAX_PEOPLE in a household. People are
+    # numbered within their household, adults before children in each
+    # benefit unit.
+    benunit_household = members(rng, sernum, 1, 3)
+    benunit_sernum = sernum[benunit_household]
+    benunit_number = (
+        pd.Series(benunit_sernum).groupby(benunit_sernum).cumcount().values + 1
+    )
+    files["benunit.tab"] = pd.DataFrame(
+        dict(
+            sernum=benunit_sernum,
+            BENUNIT=benunit_number,
+            GROSS4=weight[benunit_household],
+        )
+    )
+    adult_benunit = members(rng, benunit_sernum, 1, 2)
+    child_benunit = members(rng, benunit_sernum, 0, 2)
+    household_adults = np.bincount(
+        benunit_household[adult_benunit], minlength=num_households
+    )
+    child_household = benunit_household[child_benunit]
+    child_number = (
+        pd.Series(child_household).groupby(child_household).cumcount().values
+    )
+    child_benunit = child_benunit[
+        child_number < MAX_PEOPLE - household_adults[child_household]
+    ]
+    person_benunit = np.concatenate([adult_benunit, child_benunit])
+    is_adult = np.arange(len(person_benunit)) < len(adult_benunit)
+    order = np.lexsort((~is_adult, person_benunit))
+    person_benunit = person_benunit[order]
+    is_adult = is_adult[order]
+    person_sernum = benunit_sernum[person_benunit]
+    person_number = (
+        pd.Series(person_sernum).groupby(person_sernum).cumcount().values + 1
+    )
+    people = pd.DataFrame(
+        dict(
+            sernum=person_sernum,
+            BENUNIT=benunit_number[person_benunit],
+            PERSON=person_number,
+        )
+    )
+    adults = people[is_adult].reset_index(drop=True)
+    children = people[~is_adult].reset_index(drop=True)
+
+    num_adults = len(adults)
+    files["adult.tab"] = adults.assign(
+        UPERSON=adults.groupby(["sernum", "BENUNIT"]).cumcount().values + 1,
+        GROSS4=weight[adults.sernum - 1],
+        INEARNS=rng.uniform(0, 900, num_adults).round(2),
+        INPENINC=blank(rng.uniform(0, 300, num_adults).round(2), rng),
+        AGE80=rng.integers(16, 81, num_adults),
+        HOURTOT=rng.integers(0, 11, num_adults),
+        TOTHOURS=rng.integers(0, 51, num_adults),
+        ININV=rng.uniform(0, 20, num_adults).round(2),
+        INRINC=rng.choice([0, 12.5], num_adults),
+        INDISBEN=blank(np.full(num_adults, 10), rng),
+        INOTHBEN=rng.integers(0, 101, num_adults),
+        INTXCRED=0,
+        INDUC=blank(np.full(num_adults, 5.5), rng),
+        NINDINC=rng.uniform(0, 1000, num_adults).round(2),
+        SLREPAMT=blank(np.full(num_adults, 20), rng),
+        LAREG=rng.integers(1, 3, num_adults),
+        DISCORA1=rng.integers(1, 3, num_adults),
+        DISACTA1=rng.integers(1, 3, num_adults),
+    )
+
+    num_children = len(children)
+    files["child.tab"] = children.assign(
+        AGE=rng.integers(0, 16, num_children),
+        CHRINC=blank(np.ones(num_children), rng),
+        CHEARNS=0,
+        CHINCDV=rng.uniform(0, 5, num_children).round(2),
+        LAREG=2,
+        DISCORC1=rng.integers(1, 3, num_children),
+        DISACTC1=2,
+    )
+
+    job = adults.iloc[members(rng, adults.index, 0, 2)]
+    files["job.tab"] = job.assign(
+        SEINCAMT=blank(rng.uniform(0, 500, len(job)).round(2), rng)
+    )
+
+    benefit = adults.iloc[members(rng, adults.index, 0, 3)]
+    files["benefits.tab"] = benefit.assign(
+        BENEFIT=rng.choice(BENEFIT_CODES, len(benefit)),
+        BENAMT=rng.uniform(0, 200, len(benefit)).round(2),
+        VAR2=rng.integers(0, 7, len(benefit)),
+    )
+
+    maintenance = adults[rng.random(num_adults) < 0.02]
+    files["maint.tab"] = maintenance.assign(
+        MRUAMT=rng.choice([0, 50], len(maintenance)), MRAMT=30
+    )
+
+    childcare = children.iloc[members(rng, children.index, 0, 1)]
+    files["chldcare.tab"] = childcare.assign(
+        CHAMT=rng.uniform(0, 100, len(childcare)).round(2),
+        REGISTRD=rng.integers(1, 3, len(childcare)),
+    )
+
+    for filename, frame in files.items():
+        # The last column name of a TAB file is read with its line ending,
+        # as in the FRS, so it is one no table reads.
+        frame = frame.assign(FILLER=0)
+        frame.to_csv(folder / filename, sep="\t", index=False, na_rep=" ")
+    return {filename: len(frame) for filename, frame in files.items()}
@@ -1,42 +1,6 @@
-from frs.dataset import Table, Person, BenUnit, Household
-from frs.utils import yearly, add
-
-
-class Adult(Table):
-    enums = {}
-    entity = Person
-    filename = "adult.tab"
-
-    @staticmethod
-    def parse(person: dict, line: dict) -> dict:
-        person["person_id"] = Person.id(line)
-        person["benunit_id"] = BenUnit.id(line)
-        person["household_id"] = Household.id(line)
-        person["is_adult"] = True
-        person["is_child"] = False
-        person["adult_weight"] = line["GROSS4"]
-        person["role"] = "adult"
-        person["earnings"] = yearly(line["INEARNS"])
-        person["pension_income"] = yearly(line["INPENINC"])
-        person["age"] = line["AGE80"]
-        person["care_hours"] = CARE_HOURS_CODES[line["HOURTOT"]]
-        person["hours"] = line["TOTHOURS"]
-        person["savings_interest"] = yearly(line["ININV"])
-        person["misc_income"] = yearly(line["INRINC"])
-        person["total_benefits"] = add(
-            line, "INDISBEN", "INOTHBEN", "INTXCRED", "INDUC"
-        )
-        person["is_household_head"] = int(line["PERSON"]) == 1
-        person["is_benunit_head"] = int(line["UPERSON"]) == 1
-        person["FRS_net_income"] = (
-            yearly(line["NINDINC"]) - person["misc_income"]
-        )
-        person["student_loan_repayment"] = line["SLREPAMT"]
-        person["registered_disabled"] = line["LAREG"] == 1
-        person["dis_equality_act_core"] = line["DISCORA1"] == 1
-        person["dis_equality_act_wider"] = line["DISACTA1"] == 1
-        return person
-
+from frs.dataset import MappedTable, Person, BenUnit, Household
+from frs.mapping import Column, Field, ID
+import pandas as pd
 
 CARE_HOURS_CODES = {
     0: 0,
@@ -51,3 +15,52 @@ CARE_HOURS_CODES = {
     9: 30,
     10: 35,
 }
+
+
+class Adult(MappedTable):
+    enums = {}
+    entity = Person
+    filename = "adult.tab"
+    dtypes = {
+        "person_id": "int32",
+        "benunit_id": "int32",
+        "household_id": "int32",
+        "is_adult": "bool",
+        "is_child": "bool",
+        "role": pd.CategoricalDtype(["adult", "child"]),
+        "age": "int8",
+        "care_hours": "int8",
+        "is_household_head": "bool",
+        "is_benunit_head": "bool",
+        "registered_disabled": "bool",
+        "dis_equality_act_core": "bool",
+        "dis_equality_act_wider": "bool",
+    }
+
+    mapping = dict(
+        person_id=ID(Person),
+        benunit_id=ID(BenUnit),
+        household_id=ID(Household),
+        is_adult=True,
+        is_child=False,
+        adult_weight=Column("GROSS4"),
+        role="adult",
+        earnings=Column("INEARNS").yearly(),
+        pension_income=Column("INPENINC").yearly(),
+        age=Column("AGE80"),
+        care_hours=Column("HOURTOT").map(CARE_HOURS_CODES),
+        hours=Column("TOTHOURS"),
+        savings_interest=Column("ININV").yearly(),
+        misc_income=Column("INRINC").yearly(),
+        total_benefits=Column("INDISBEN")
+        + Column("INOTHBEN")
+        + Column("INTXCRED")
+        + Column("INDUC"),
+        is_household_head=Column("PERSON") == 1,
+        is_benunit_head=Column("UPERSON") == 1,
+        FRS_net_income=Column("NINDINC").yearly() - Field("misc_income"),
+        student_loan_repayment=Column("SLREPAMT"),
+        registered_disabled=Column("LAREG") == 1,
+        dis_equality_act_core=Column("DISCORA1") == 1,
+        dis_equality_act_wider=Column("DISACTA1") == 1,
+    )
@@ -1,6 +1,7 @@
-from frs.dataset import Table, Person, BenUnit, Household
+from frs.dataset import PivotTable, Person, BenUnit, Household, SafeColumns
 from frs.utils import yearly, add
-
+import numpy as np
+import pandas as pd
 
 BENEFITS = {
     1: "DLA_SC",
@@ -99,7 +100,7 @@ BENUNIT_LEVEL_BENEFITS = [
 ]
 
 
-class Benefit(Table):
+class Benefit(PivotTable):
     enums = {}
     entity = [Person, BenUnit]
     filename = "benefits.tab"
@@ -116,27 +117,27 @@ class Benefit(Table):
         for benefit in BENEFITS.values()
         if benefit in BENUNIT_LEVEL_BENEFITS and benefit in SIMULATED
     ]
+    # People receiving the same benefit more than once report each receipt.
+    reducer = "sum"
 
     @staticmethod
-    def parse(person: dict, benunit: dict, line: dict) -> dict:
+    def pivot(line: SafeColumns) -> list:
         code = line["BENEFIT"]
-        if code in BENEFITS:
-            name = BENEFITS[code]
-            amount = line["BENAMT"]
-            if code == 5:
-                amount = yearly(line["BENAMT"])
-            elif code == 14:
-                JSA_type = JSA_ESA_TYPES[line["VAR2"]]
-                name = name.replace("JSA", f"JSA_{JSA_type}")
-            elif code == 16:
-                ESA_type = JSA_ESA_TYPES[line["VAR2"]]
-                name = name.replace("ESA", f"ESA_{ESA_type}")
-            if name in BENUNIT_LEVEL_BENEFITS:
-                if name in SIMULATED:
-                    benunit[name + "_reported"] = amount
-            else:
-                if name in SIMULATED:
-                    person[name + "_reported"] = amount
-            if code == 16:
-                person["ESA_income_reported_personal"] = amount
-        return person, benunit
+        name = code.map(BENEFITS)
+        var2 = line["VAR2"]
+        unknown = code.isin([14, 16]) & ~var2.isin(list(JSA_ESA_TYPES))
+        if unknown.any():
+            # JSA and ESA receipts of an unknown type would be dropped.
+            bad = var2[unknown].iloc[0]
+            bad = int(bad) if float(bad).is_integer() else bad
+            raise KeyError(f"{bad!r} is not a known code of VAR2.")
+        benefit_type = var2.map(JSA_ESA_TYPES)
+        name = name.mask(code == 14, "JSA_" + benefit_type)
+        name = name.mask(code == 16, "ESA_" + benefit_type)
+        amount = line["BENAMT"].where(code != 5, yearly(line["BENAMT"]))
+        reported = name.where(name.isin(SIMULATED)) + "_reported"
+        personal = pd.Series(
+            np.where(code == 16, "ESA_income_reported_personal", None),
+            index=code.index,
+        )
+        return [(reported, amount), (personal, amount)]
@@ -1,15 +1,15 @@
-from frs.dataset import Table, Person, BenUnit, Household
-from frs.utils import yearly, add
+from frs.dataset import MappedTable, BenUnit, Household
+from frs.mapping import Column, ID
 
 
-class Benunit(Table):
+class Benunit(MappedTable):
     enums = {}
     entity = BenUnit
     filename = "benunit.tab"
+    dtypes = {"household_id": "int32", "benunit_id": "int32"}
 
-    @staticmethod
-    def parse(benunit: dict, line: dict) -> dict:
-        benunit["household_id"] = Household.id(line)
-        benunit["benunit_id"] = BenUnit.id(line)
-        benunit["benunit_weight"] = line["GROSS4"]
-        return benunit
+    mapping = dict(
+        household_id=ID(Household),
+        benunit_id=ID(BenUnit),
+        benunit_weight=Column("GROSS4"),
+    )
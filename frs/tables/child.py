@@ -1,27 +1,41 @@
-from frs.dataset import Table, Person, BenUnit, Household
-from frs.utils import yearly, add
+from frs.dataset import MappedTable, Person, BenUnit, Household
+from frs.mapping import Column, Field, ID
+import pandas as pd
 
 
-class Child(Table):
+class Child(MappedTable):
     enums = {}
     entity = Person
     filename = "child.tab"
+    dtypes = {
+        "person_id": "int32",
+        "benunit_id": "int32",
+        "household_id": "int32",
+        "is_adult": "bool",
+        "is_child": "bool",
+        "role": pd.CategoricalDtype(["adult", "child"]),
+        "age": "int8",
+        "registered_disabled": "bool",
+        "dis_equality_act_core": "bool",
+        "dis_equality_act_wider": "bool",
+        "is_benunit_head": "bool",
+        "is_household_head": "bool",
+    }
 
-    @staticmethod
-    def parse(person: dict, line: dict) -> dict:
-        person["person_id"] = Person.id(line)
-        person["is_adult"] = False
-        person["is_child"] = True
-        person["benunit_id"] = BenUnit.id(line)
-        person["household_id"] = Household.id(line)
-        person["role"] = "child"
-        person["age"] = line["AGE"]
-        person["misc_income"] = yearly(line["CHRINC"])
-        person["earnings"] = yearly(line["CHEARNS"])
-        person["FRS_net_income"] = line["CHINCDV"] - person["misc_income"]
-        person["registered_disabled"] = line["LAREG"] == 1
-        person["dis_equality_act_core"] = line["DISCORC1"] == 1
-        person["dis_equality_act_wider"] = line["DISACTC1"] == 1
-        person["is_benunit_head"] = False
-        person["is_household_head"] = False
-        return person
+    mapping = dict(
+        person_id=ID(Person),
+        is_adult=False,
+        is_child=True,
+        benunit_id=ID(BenUnit),
+        household_id=ID(Household),
+        role="child",
+        age=Column("AGE"),
+        misc_income=Column("CHRINC").yearly(),
+        earnings=Column("CHEARNS").yearly(),
+        FRS_net_income=Column("CHINCDV") - Field("misc_income"),
+        registered_disabled=Column("LAREG") == 1,
+        dis_equality_act_core=Column("DISCORC1") == 1,
+        dis_equality_act_wider=Column("DISACTC1") == 1,
+        is_benunit_head=False,
+        is_household_head=False,
+    )
@@ -1,13 +1,11 @@
-from frs.dataset import Table, Person, BenUnit, Household
-from frs.utils import yearly, add
+from frs.dataset import MappedTable, Person
+from frs.mapping import Column
 
 
-class Childcare(Table):
+class Childcare(MappedTable):
     enums = {}
     entity = Person
     filename = "chldcare.tab"
+    accumulate = ["childcare"]
 
-    @staticmethod
-    def parse(person: dict, line: dict) -> dict:
-        person["childcare"] += line["CHAMT"] * (line["REGISTRD"] == 1)
-        return person
+    mapping = dict(childcare=Column("CHAMT") * (Column("REGISTRD") == 1))
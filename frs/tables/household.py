@@ -1,34 +1,13 @@
-from frs.dataset import Table, Person, BenUnit, Household
-from frs.utils import yearly, add
-
-
-class HHold(Table):
-    enums = {}
-    entity = Household
-    filename = "househol.tab"
-
-    @staticmethod
-    def parse(household: dict, line: dict) -> dict:
-        household["household_id"] = Household.id(line)
-        household["household_weight"] = line["GROSS4"]
-        household["country"] = COUNTRY[line["COUNTRY"]]
-        household["num_rooms"] = line["ROOMS10"]
-        household["rent"] = line["HHRENT"]
-        household["is_shared"] = line["HHSTAT"] == 2
-        household["housing_costs"] = line["GBHSCOST"] + line["NIHSCOST"]
-        band = line["CTBAND"]
-        household["council_tax"] = (
-            line["CTANNUAL"] or AVERAGE_COUNCIL_TAX[int(band - 1)]
-        )
-        household["is_social"] = line["PTENTYP2"] in [1, 2]
-        household["region"] = REGIONS_TO_NUM[GOVTREGNO[int(line["GVTREGNO"])]]
-        return household
-
+from frs.dataset import MappedTable, Household
+from frs.mapping import Column, ID
+import pandas as pd
 
 COUNTRY = {1: "ENGLAND", 2: "WALES", 3: "SCOTLAND", 4: "NI"}
 
 AVERAGE_COUNCIL_TAX = [1114, 1300, 1486, 1671, 2043, 2414, 2786, 3343, 3900, 0]
 
+# The average council tax of each band, from band 1 (A).
+COUNCIL_TAX_BANDS = dict(enumerate(AVERAGE_COUNCIL_TAX, 1))
 
 GOVTREGNO = {
     1: "NORTH_EAST",
@@ -49,3 +28,32 @@ GOVTREGNO = {
 REGIONS_TO_NUM = {
     region: i for region, i in zip(GOVTREGNO.values(), range(len(GOVTREGNO)))
 }
+
+
+class HHold(MappedTable):
+    enums = {}
+    entity = Household
+    filename = "househol.tab"
+    dtypes = {
+        "household_id": "int32",
+        "country": pd.CategoricalDtype(COUNTRY.values()),
+        "num_rooms": "int8",
+        "is_shared": "bool",
+        "is_social": "bool",
+        "region": "int8",
+    }
+
+    mapping = dict(
+        household_id=ID(Household),
+        household_weight=Column("GROSS4"),
+        country=Column("COUNTRY").map(COUNTRY),
+        num_rooms=Column("ROOMS10"),
+        rent=Column("HHRENT"),
+        is_shared=Column("HHSTAT") == 2,
+        housing_costs=Column("GBHSCOST") + Column("NIHSCOST"),
+        council_tax=Column("CTANNUAL").otherwise(
+            Column("CTBAND").map(COUNCIL_TAX_BANDS, default=0)
+        ),
+        is_social=Column("PTENTYP2").isin([1, 2]),
+        region=Column("GVTREGNO").map(GOVTREGNO).map(REGIONS_TO_NUM),
+    )
@@ -1,13 +1,11 @@
-from frs.dataset import Table, Person, BenUnit, Household
-from frs.utils import yearly, add
+from frs.dataset import MappedTable, Person
+from frs.mapping import Column
 
 
-class Job(Table):
+class Job(MappedTable):
     enums = {}
     entity = Person
     filename = "job.tab"
+    accumulate = ["profit"]
 
-    @staticmethod
-    def parse(person: dict, line: dict) -> dict:
-        person["profit"] += yearly(line["SEINCAMT"])
-        return person
+    mapping = dict(profit=Column("SEINCAMT").yearly())
@@ -1,13 +1,12 @@
-from frs.dataset import Table, Person, BenUnit, Household
-from frs.utils import yearly, add
+from frs.dataset import MappedTable, Person
+from frs.mapping import Column
 
 
-class Maintenance(Table):
+class Maintenance(MappedTable):
     enums = {}
     entity = Person
     filename = "maint.tab"
 
-    @staticmethod
-    def parse(person: dict, line: dict) -> dict:
-        person["maintenance_payments"] = line["MRUAMT"] or line["MRAMT"]
-        return person
+    mapping = dict(
+        maintenance_payments=Column("MRUAMT").otherwise(Column("MRAMT")),
+    )
@@ -1,11 +1,25 @@
+import contextlib
 import os
 import shutil
+from functools import lru_cache
 from pathlib import Path
+from typing import List
 
 WEEK = 1
 MONTH = 5
 YEAR = 52
 
+ENTITIES = ["person", "benunit", "household"]
+
+FORMATS = ["csv", "parquet", "feather", "npy"]
+
+# The household columns generated datasets can be partitioned by.
+PARTITION_COLUMNS = ["country", "region"]
+
+# The order in which load() looks for each entity's file: binary formats
+# first, as they need no text parsing.
+LOAD_ORDER = ["parquet", "feather", "npy", "csv"]
+
 PERIOD_CODES = {
     1: 1,
     2: 2,
@@ -26,15 +40,52 @@ PERIOD_CODES = {
 }
 
 
+def is_scalar(value) -> bool:
+    return value is None or isinstance(value, (int, float, str, bytes))
+
+
+def numeric(values):
+    """Converts an array or Series of values to floats, with NaN for missing
+    and non-numeric values.
+
+    Args:
+        values (array-like): The values
+
+    Returns:
+        array-like: A float array, or a float Series if values is a Series
+    """
+    import numpy as np
+
+    if getattr(getattr(values, "dtype", None), "kind", "O") in "biuf":
+        return values.astype(np.float64)
+    import pandas as pd
+
+    if isinstance(values, pd.Series):
+        return pd.to_numeric(values, errors="coerce").astype(np.float64)
+    return (
+        pd.to_numeric(
+            pd.Series(np.asarray(values, dtype=object).ravel()),
+            errors="coerce",
+        )
+        .to_numpy(np.float64)
+        .reshape(np.shape(values))
+    )
+
+
 def exists(field):
     """Determines if there is a numeric value in the field
 
     Args:
-        field (str): The field
+        field (str): The field, or an array or Series of fields
 
     Returns:
-        bool: Whether the field is numeric
+        bool: Whether the field is numeric, or an array or Series of
+        whether each field is
     """
+    if not is_scalar(field):
+        return numeric(field) == numeric(field)
+    if isinstance(field, (int, float)):
+        return field == field
     try:
         float(field)
         return True
@@ -43,67 +94,101 @@ def exists(field):
 
 
 def safe(*backups):
-    """Attempts to parse a field, with a list of backups
+    """Attempts to parse a field, with a list of backups. Each may be a single
+    field or an array or Series of fields, which are parsed element by
+    element.
 
     Returns:
-        float: The numeric result
+        float: The numeric result, or an array or Series of results
     """
+    if all(map(is_scalar, backups)):
+        for value in backups:
+            if exists(value):
+                return float(value)
+        return 0
+    import numpy as np
+
+    result = np.nan
+    series = None
     for value in backups:
-        if exists(value):
-            return float(value)
-    return 0
+        if is_scalar(value):
+            value = float(value) if exists(value) else np.nan
+        else:
+            value = numeric(value)
+            if series is None and hasattr(value, "index"):
+                series = value
+        result = np.where(np.isnan(result), value, result)
+    result = np.nan_to_num(result, nan=0.0)
+    if series is not None:
+        return type(series)(result, index=series.index)
+    return result
 
 
 def add(line, *fieldnames):
     """Attempts to add up a list of fieldnames
 
     Args:
-        line (dict): The row containing the fields
+        line (dict): The row containing the fields, or a SafeColumns of
+            whole columns
 
     Returns:
-        float: The sum of valid fields
+        float: The sum of valid fields, or an array or Series of sums
     """
     return sum(map(safe, map(lambda fieldname: line[fieldname], fieldnames)))
 
 
-PERIOD_CODES = {
-    1: 1,
-    2: 2,
-    3: 3,
-    4: 4,
-    5: 4.35,
-    7: 8.7,
-    8: 6.52,
-    9: 5.8,
-    10: 5.22,
-    13: 13,
-    17: 17.4,
-    26: 26,
-    52: 52,
-    90: 0.5,
-    95: 1000,
-    97: 1000,
-}
+@lru_cache(maxsize=None)
+def period_lookup():
+    """Returns PERIOD_CODES as an array indexed by period code, with NaN for
+    codes that are not periods. Built once, on first use.
+    """
+    import numpy as np
 
-WEEK = 1
-MONTH = 5
-YEAR = 52
+    lookup = np.full(max(PERIOD_CODES) + 1, np.nan)
+    for code, weeks in PERIOD_CODES.items():
+        lookup[code] = weeks
+    return lookup
+
+
+def period_weeks(period_code):
+    """Returns the length of each of an array or Series of period codes, in
+    the units of PERIOD_CODES, with NaN for missing and unknown codes.
+    """
+    import numpy as np
+
+    lookup = period_lookup()
+    codes = numeric(period_code)
+    array = np.asarray(codes)
+    valid = (array >= 0) & (array < len(lookup)) & (array == np.floor(array))
+    weeks = np.where(
+        valid, lookup[np.where(valid, array, 0).astype(np.intp)], np.nan
+    )
+    if hasattr(codes, "index"):
+        return type(codes)(weeks, index=codes.index)
+    return weeks
 
 
 def adjust_period(value, period_code=WEEK, target_period_code=YEAR):
     """Adjusts a value from one period to another
 
     Args:
-        value (float): The value
-        period_code (int, optional): The original period code. Defaults to WEEK.
+        value (float): The value, or an array or Series of values
+        period_code (int, optional): The original period code, or an array
+            or Series of codes, one per value. Defaults to WEEK.
         target_period_code (int, optional): The target period code. Defaults to YEAR.
 
     Returns:
-        float: The adjusted value
+        float: The adjusted value, or an array or Series of values. Values
+        with a missing or unknown period code in an array of codes are NaN.
     """
-    relative_size = (
-        PERIOD_CODES[target_period_code] / PERIOD_CODES[period_code]
-    )
+    if is_scalar(period_code):
+        relative_size = (
+            PERIOD_CODES[target_period_code] / PERIOD_CODES[period_code]
+        )
+    else:
+        relative_size = PERIOD_CODES[target_period_code] / period_weeks(
+            period_code
+        )
     return value * relative_size
 
 
@@ -112,7 +197,97 @@ def yearly(value):
 
 
 def resolve(filename):
-    return Path(os.path.dirname(__file__)) / filename
+    """Returns the path of a file in the data folder. This is the package
+    folder, unless the FRS_DATA environment variable names another.
+    """
+    return (
+        Path(os.environ.get("FRS_DATA", os.path.dirname(__file__))) / filename
+    )
+
+
+@contextlib.contextmanager
+def data_folder(folder: Path):
+    """Points the data folder at another folder for a while."""
+    previous = os.environ.get("FRS_DATA")
+    os.environ["FRS_DATA"] = str(folder)
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["FRS_DATA"]
+        else:
+            os.environ["FRS_DATA"] = previous
+
+
+def year_data(year: int = None):
+    """Points the data folder at the folder of a survey year, which holds its
+    own tab and csv folders and metadata, for a while. Without a year, the
+    data folder is left as it is.
+    """
+    if year is None:
+        return contextlib.nullcontext()
+    return data_folder(resolve(str(year)))
+
+
+def year_folder(year: int = None) -> Path:
+    """Returns the data folder of a survey year, or the data folder itself
+    without a year, without changing the data folder as year_data does.
+    """
+    if year is None:
+        return resolve(".")
+    return resolve(str(year))
+
+
+def stored_years() -> List[int]:
+    """Returns the survey years stored in the data folder, if it exists."""
+    if not resolve(".").is_dir():
+        return []
+    return sorted(
+        int(path.name)
+        for path in resolve(".").iterdir()
+        if path.is_dir() and path.name.isdigit()
+    )
+
+
+def filter_values(values, dtype=None) -> list:
+    """Returns a value, or list of values, of a load() filter as a list,
+    converted to the dtype of the household column it is matched against
+    if given, so that 8, 8.0 and "8" all match a region of 8. Values that
+    cannot be converted are left out, as they match no household.
+    """
+    if isinstance(values, (str, bytes)) or not hasattr(values, "__iter__"):
+        values = [values]
+    values = list(values)
+    if dtype is None:
+        return values
+    import pandas as pd
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if not pd.api.types.is_numeric_dtype(dtype):
+        return [str(value) for value in values]
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+    return numbers.dropna().tolist()
+
+
+def partition_name(value) -> str:
+    """Returns the text a partition of a household column's value is named
+    by, writing whole numbers without a decimal point.
+    """
+    if isinstance(value, (bool, str)):
+        return str(value)
+    try:
+        if float(value).is_integer():
+            return str(int(value))
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+def output_path(folder: Path, name: str, format: str) -> Path:
+    if format == "npy":
+        return folder / name
+    return folder / f"{name}.{format}"
 
 
 def clean_dirs(output_dir):
@@ -125,8 +300,5 @@ def clean_dirs(output_dir):
 
 
 def ensure_folders_exist():
-    path = os.path.dirname(__file__)
-    if "csv" not in os.listdir(path):
-        os.makedirs(os.path.join(path, "csv"))
-    if "tab" not in os.listdir(path):
-        os.makedirs(os.path.join(path, "tab"))
+    os.makedirs(resolve("csv"), exist_ok=True)
+    os.makedirs(resolve("tab"), exist_ok=True)
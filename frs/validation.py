@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+# The ID column of each entity, and the number that starts its IDs.
+ID_COLUMNS = dict(
+    person=("person_id", 1000000),
+    benunit=("benunit_id", 2000000),
+    household=("household_id", 3000000),
+)
+
+# The entities each entity's rows must belong to.
+PARENTS = dict(person=["benunit", "household"], benunit=["household"])
+
+# The range each column's values must lie in, where it is present.
+RANGES = dict(
+    age=(0, 120),
+    hours=(0, 168),
+    care_hours=(0, 168),
+    num_rooms=(0, 100),
+)
+
+
+def validate(datasets: Dict[str, pd.DataFrame]) -> List[str]:
+    """Checks generated datasets for problems that would otherwise only show
+    up when they are used:
+
+    - Every person, benefit unit and household has a unique ID, which
+      encodes the sernum of its household. IDs of people or benefit units
+      numbered 10 or more within a household run into the next household's
+      IDs, and are reported as not encoding their household.
+    - Every person's benefit unit and household, and every benefit unit's
+      household, exists, and people belong to the household of their
+      benefit unit.
+    - Every household has people and benefit units, and every benefit unit
+      has people.
+    - Weights are finite and not negative, and the columns in RANGES are
+      within their ranges.
+
+    Entities that are not given are skipped, as are the checks that need
+    them.
+
+    Args:
+        datasets (Dict[str, pd.DataFrame]): The dataset of each entity, such
+            as dict(person=person, benunit=benunit, household=household)
+
+    Returns:
+        List[str]: A description of each problem found. Empty if there are
+        none.
+    """
+    problems = []
+    ids = {}
+    for name, frame in datasets.items():
+        column, start = ID_COLUMNS[name]
+        if column not in frame:
+            problems += [f"{name}: no {column} column"]
+            continue
+        ids[name] = frame[column].to_numpy(np.int64)
+        problems += check_unique(name, column, ids[name])
+        problems += check_values(name, frame)
+    for name, parents in PARENTS.items():
+        if name not in ids:
+            continue
+        frame = datasets[name]
+        for parent in parents:
+            column, start = ID_COLUMNS[parent]
+            if parent not in ids or column not in frame:
+                continue
+            values = frame[column].to_numpy(np.int64)
+            problems += check_members(
+                name, column, values, ids[parent], parent
+            )
+            if parent != "household":
+                continue
+            own_column, own_start = ID_COLUMNS[name]
+            wrong = (ids[name] - own_start) // 10 != (values - start) // 10
+            problems += describe(
+                name,
+                wrong,
+                ids[name],
+                f"{own_column} values that do not encode their "
+                f"household's sernum",
+            )
+    if {"person", "benunit"} <= set(ids) and "household_id" in (
+        datasets["person"]
+    ):
+        benunit_household = pd.Series(
+            datasets["benunit"]["household_id"].to_numpy(np.int64),
+            index=ids["benunit"],
+        )
+        benunit_household = benunit_household[
+            ~benunit_household.index.duplicated()
+        ]
+        expected = benunit_household.reindex(
+            datasets["person"]["benunit_id"].to_numpy(np.int64)
+        ).to_numpy()
+        actual = datasets["person"]["household_id"].to_numpy(np.int64)
+        problems += describe(
+            "person",
+            ~np.isnan(expected) & (expected != actual),
+            ids["person"],
+            "people in a different household to their benefit unit",
+        )
+    return problems
+
+
+def check_unique(name: str, column: str, ids: np.ndarray) -> List[str]:
+    ids = np.sort(ids)
+    return describe(
+        name, ids[1:] == ids[:-1], ids[1:], f"duplicate {column} values"
+    )
+
+
+def check_members(
+    name: str,
+    column: str,
+    values: np.ndarray,
+    parent_ids: np.ndarray,
+    parent: str,
+) -> List[str]:
+    """Checks that every row of an entity belongs to an existing row of a
+    higher entity, and that every row of the higher entity has members.
+    """
+    found = np.isin(values, parent_ids)
+    problems = describe(
+        name, ~found, values, f"{column} values with no {parent} row"
+    )
+    return problems + describe(
+        parent,
+        ~np.isin(parent_ids, values),
+        parent_ids,
+        f"{parent}s with no {name} rows",
+    )
+
+
+def check_values(name: str, frame: pd.DataFrame) -> List[str]:
+    problems = []
+    for column in frame.columns:
+        if column.endswith("_weight"):
+            low, high = 0, np.inf
+        elif column in RANGES:
+            low, high = RANGES[column]
+        else:
+            continue
+        values = frame[column].to_numpy(np.float64)
+        problems += describe(
+            name,
+            ~(np.isfinite(values) & (values >= low) & (values <= high)),
+            values,
+            f"{column} values outside [{low}, {high}]",
+        )
+    return problems
+
+
+def describe(
+    name: str, wrong: np.ndarray, values: np.ndarray, problem: str
+) -> List[str]:
+    """Describes a problem with some of an entity's rows, with examples of
+    the values affected, or returns nothing if no rows are affected.
+    """
+    count = int(np.count_nonzero(wrong))
+    if not count:
+        return []
+    examples = ", ".join(map(str, np.unique(values[wrong])[:3]))
+    return [f"{name}: {count} {problem} (e.g. {examples})"]
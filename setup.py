@@ -32,4 +32,5 @@ setuptools.setup(
         "console_scripts": ["frs=frs.main:main"],
     },
     install_requires=install_requires,
+    extras_require={"parquet": ["pyarrow"], "zstd": ["zstandard"]},
 )
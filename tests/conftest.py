@@ -0,0 +1,9 @@
+import pytest
+from frs.synthetic import generate_tab
+
+
+@pytest.fixture(scope="session")
+def tab(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("tab")
+    generate_tab(folder, scale=0.02, seed=1)
+    return folder
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from frs.aggregate import Aggregator
+from frs.main import build
+
+
+@pytest.fixture(scope="module")
+def datasets(tab):
+    person, benunit, household = build(path=tab)
+    # The last region's households lose their people and benefit units, so
+    # grouping people by region ends with an empty group.
+    last = household["region"].max()
+    empty = household["household_id"][household["region"] == last]
+    person = person[~person["household_id"].isin(empty)]
+    benunit = benunit[~benunit["household_id"].isin(empty)]
+    return person, benunit, household
+
+
+def reference(person, household, column):
+    frame = person.merge(
+        household[["household_id", "region", "household_weight"]],
+        on="household_id",
+    )
+    frame["weighted"] = frame[column] * frame["household_weight"]
+    groups = frame.groupby("region")
+    regions = np.sort(household["region"].unique())
+    total = groups["weighted"].sum().reindex(regions, fill_value=0)
+    weight = groups["household_weight"].sum().reindex(regions, fill_value=0)
+    return total, total / weight
+
+
+def test_aggregate_matches_groupby(datasets):
+    person, benunit, household = datasets
+    aggregator = Aggregator(person, benunit, household)
+    total, mean = reference(person, household, "earnings")
+    sums = aggregator.sum("earnings", by="region")["earnings"]
+    means = aggregator.mean("earnings", by="region")["earnings"]
+    assert sums.iloc[-1] == 0 and np.isnan(means.iloc[-1])
+    np.testing.assert_allclose(sums.to_numpy(), total.to_numpy())
+    np.testing.assert_allclose(means.to_numpy(), mean.to_numpy())
+    assert aggregator.sum("earnings")["earnings"] == pytest.approx(total.sum())
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+from frs.dataset import Person, Table
+from frs.main import build
+from frs.tables import tables
+from frs.utils import ENTITIES
+
+
+def test_engines_match(tab):
+    row = build(path=tab, engine="row")
+    column = build(path=tab, engine="column")
+    for name, row_frame, column_frame in zip(ENTITIES, row, column):
+        assert len(row_frame) > 0, name
+        pd.testing.assert_frame_equal(row_frame, column_frame, obj=name)
+
+
+@pytest.mark.parametrize("engine", ["row", "column"])
+@pytest.mark.parametrize(
+    "filename, changes, column",
+    [
+        ("househol.tab", dict(COUNTRY="7"), "COUNTRY"),
+        ("benefits.tab", dict(BENEFIT="14", VAR2="9"), "VAR2"),
+        ("benefits.tab", dict(BENEFIT="16", VAR2="9"), "VAR2"),
+    ],
+)
+def test_unknown_code_raises(tab, tmp_path, engine, filename, changes, column):
+    for path in tab.iterdir():
+        text = path.read_text()
+        if path.name == filename:
+            header, first, rest = text.split("\n", 2)
+            names = header.split("\t")
+            values = first.split("\t")
+            for name, value in changes.items():
+                values[names.index(name)] = value
+            text = "\n".join([header, "\t".join(values), rest])
+        (tmp_path / path.name).write_text(text)
+    with pytest.raises(KeyError, match=column):
+        build(path=tmp_path, engine=engine)
+
+
+class Extra(Table):
+    entity = Person
+    filename = "adult.tab"
+
+    @staticmethod
+    def parse(person: dict, line: dict) -> dict:
+        person["person_id"] = Person.id(line)
+        person["double_age"] = line["AGE80"] * 2
+        return person
+
+
+def test_table_with_only_parse(tab):
+    person, *_ = build(path=tab, tables=tables + [Extra], engine="row")
+    assert person.columns[-1] == "double_age"
+    adults = person["is_adult"].astype(bool)
+    assert (
+        person["double_age"][adults] == 2 * person["age"][adults].astype(int)
+    ).all()
+    assert (person["double_age"][~adults] == 0).all()
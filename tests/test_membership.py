@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from frs.membership import MembershipIndex, reduce_segments
+
+VALUES = np.arange(1, 6)
+
+
+@pytest.mark.parametrize(
+    "bounds, expected",
+    [
+        ([0, 5, 5], [15, 0]),
+        ([0, 5, 5, 5], [15, 0, 0]),
+        ([0, 0, 2, 5], [0, 3, 12]),
+        ([0, 2, 2, 5], [3, 0, 12]),
+        ([0, 0, 2, 2, 5, 5], [0, 3, 0, 12, 0]),
+    ],
+)
+def test_reduce_segments_with_empty_segments(bounds, expected):
+    totals = reduce_segments(VALUES, np.array(bounds))
+    np.testing.assert_array_equal(totals, expected)
+
+
+def test_reduce_segments_of_rows():
+    values = np.column_stack([VALUES, 10 * VALUES])
+    totals = reduce_segments(values, np.array([0, 2, 5, 5]))
+    np.testing.assert_array_equal(totals, [[3, 30], [12, 120], [0, 0]])
+
+
+def test_reduce_segments_of_nothing():
+    totals = reduce_segments(VALUES[:0], np.array([0, 0, 0]))
+    np.testing.assert_array_equal(totals, [0, 0])
+
+
+def test_sum_with_a_household_without_people():
+    household = pd.DataFrame(dict(household_id=[10, 20, 30]))
+    benunit = pd.DataFrame(dict(benunit_id=[11, 21], household_id=[10, 20]))
+    person = pd.DataFrame(
+        dict(
+            person_id=[1, 2, 3, 4, 5],
+            benunit_id=[11, 11, 21, 21, 21],
+            household_id=[10, 10, 20, 20, 20],
+        )
+    )
+    index = MembershipIndex.build(person, benunit, household)
+    np.testing.assert_array_equal(index.sum(VALUES), [3, 12, 0])
+    np.testing.assert_array_equal(
+        index.sum(np.ones(2), "benunit", "household"), [1, 1, 0]
+    )
@@ -0,0 +1,41 @@
+import shutil
+import pytest
+from frs import sources
+from frs.sources import describe_sources, recorded_sources, stale_entities
+from frs.tables import tables
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    # A copy of the package, whose modules can be changed.
+    folder = tmp_path / "frs"
+    shutil.copytree(
+        sources.PACKAGE,
+        folder,
+        ignore=shutil.ignore_patterns("__pycache__", "csv", "tab", "*.json"),
+    )
+    monkeypatch.setattr(sources, "PACKAGE", folder)
+    return folder
+
+
+@pytest.mark.parametrize(
+    "module", ["mapping.py", "dataset.py", "utils.py", "tables/__init__.py"]
+)
+def test_shared_module_change_makes_every_entity_stale(package, module):
+    metadata = describe_sources(tables)
+    for current in (
+        describe_sources(tables, metadata),
+        recorded_sources(metadata),
+    ):
+        reasons = stale_entities(metadata, current)
+        assert not any("code changed" in r for r in sum(reasons.values(), []))
+    with open(package / module, "a") as f:
+        f.write("\n# Changed.\n")
+    for current in (
+        describe_sources(tables, metadata),
+        recorded_sources(metadata),
+    ):
+        stale = stale_entities(metadata, current)
+        assert set(stale) == set(metadata["entities"])
+        for reasons in stale.values():
+            assert f"{module} code changed" in reasons
@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+from frs.benchmark import HEAVY_MODULES, STARTUP_SCRIPT
+
+
+def run(script: str, folder) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, FRS_DATA=str(folder)),
+    ).stdout
+
+
+def test_import_leaves_out_heavy_modules(tmp_path):
+    script = (
+        "import json, sys, frs\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES} if m in sys.modules]))"
+    )
+    assert json.loads(run(script, tmp_path)) == []
+
+
+def test_status_leaves_out_heavy_modules(tmp_path):
+    output = run(STARTUP_SCRIPT.format(modules=HEAVY_MODULES), tmp_path)
+    assert json.loads(output.splitlines()[-1])["modules"] == []